@@ -4,7 +4,8 @@
  *
  * High-performance capture with:
  * - Asynchronous I/Q streaming
- * - Ring buffer to prevent drops
+ * - Lock-free single-producer/single-consumer ring buffer between the USB
+ *   callback and the file writer (no allocation or locking per callback)
  * - Binary output for maximum throughput
  *
  * Author: Luke Waszyn
@@ -14,12 +15,11 @@
 #include <rtl-sdr.h>
 #include <iostream>
 #include <fstream>
+#include <iomanip>
 #include <vector>
-#include <queue>
-#include <mutex>
 #include <thread>
-#include <condition_variable>
 #include <atomic>
+#include <algorithm>
 #include <chrono>
 #include <cstring>
 #include <csignal>
@@ -30,45 +30,69 @@
 #define DEFAULT_SAMPLE_RATE 2400000     // 2.4 MS/s
 #define DEFAULT_GAIN        400         // 40.0 dB (gain is in tenths)
 #define DEFAULT_DURATION    900         // 15 minutes
-#define BUFFER_SIZE         (16 * 16384) // 256KB per buffer
-#define NUM_BUFFERS         16          // Ring buffer depth
+#define BUFFER_SIZE         (16 * 16384) // 256KB per USB buffer (--usb-buf-len)
+#define NUM_BUFFERS         16          // USB buffer count (--usb-buf-count)
+#define DEFAULT_RING_MB     32          // Sample ring between callback and writer
 
 // Global state
 static std::atomic<bool> g_running(true);
 static rtlsdr_dev_t *g_dev = nullptr;
 
-// Thread-safe queue for I/Q buffers
-class BufferQueue {
+// Single-producer/single-consumer byte ring for I/Q samples.
+// The USB callback is the only writer and the writer thread the only reader;
+// head/tail are monotonically increasing byte counts, published with
+// release/acquire ordering.
+class RingBuffer {
 public:
-    void push(std::vector<uint8_t>&& buf) {
-        std::lock_guard<std::mutex> lock(mutex_);
-        queue_.push(std::move(buf));
-        cv_.notify_one();
+    void init(size_t capacity) {
+        buf_.assign(capacity, 0);
+        cap_ = capacity;
     }
     
-    bool pop(std::vector<uint8_t>& buf, int timeout_ms = 1000) {
-        std::unique_lock<std::mutex> lock(mutex_);
-        if (cv_.wait_for(lock, std::chrono::milliseconds(timeout_ms),
-                         [this] { return !queue_.empty(); })) {
-            buf = std::move(queue_.front());
-            queue_.pop();
-            return true;
+    // Producer: copy len bytes in, or return false if there isn't room
+    bool write(const uint8_t* data, size_t len) {
+        uint64_t head = head_.load(std::memory_order_relaxed);
+        uint64_t tail = tail_.load(std::memory_order_acquire);
+        if (cap_ - (head - tail) < len) {
+            return false;
         }
-        return false;
+        size_t off = head % cap_;
+        size_t first = std::min(len, cap_ - off);
+        std::memcpy(&buf_[off], data, first);
+        std::memcpy(&buf_[0], data + first, len - first);
+        head_.store(head + len, std::memory_order_release);
+        return true;
     }
     
-    size_t size() {
-        std::lock_guard<std::mutex> lock(mutex_);
-        return queue_.size();
+    // Consumer: contiguous readable region of at most max_len bytes
+    size_t peek(const uint8_t** data, size_t max_len) {
+        uint64_t tail = tail_.load(std::memory_order_relaxed);
+        uint64_t head = head_.load(std::memory_order_acquire);
+        size_t off = tail % cap_;
+        size_t n = std::min({static_cast<size_t>(head - tail), cap_ - off, max_len});
+        *data = &buf_[off];
+        return n;
     }
     
+    // Consumer: release n bytes returned by peek()
+    void consume(size_t n) {
+        tail_.store(tail_.load(std::memory_order_relaxed) + n, std::memory_order_release);
+    }
+    
+    size_t used() const {
+        return head_.load(std::memory_order_acquire) - tail_.load(std::memory_order_acquire);
+    }
+    
+    size_t capacity() const { return cap_; }
+    
 private:
-    std::queue<std::vector<uint8_t>> queue_;
-    std::mutex mutex_;
-    std::condition_variable cv_;
+    std::vector<uint8_t> buf_;
+    size_t cap_ = 0;
+    alignas(64) std::atomic<uint64_t> head_{0};
+    alignas(64) std::atomic<uint64_t> tail_{0};
 };
 
-static BufferQueue g_buffer_queue;
+static RingBuffer g_ring;
 static std::atomic<uint64_t> g_samples_captured(0);
 static std::atomic<uint64_t> g_bytes_written(0);
 static std::atomic<int> g_overflows(0);
@@ -86,16 +110,14 @@ void rtlsdr_callback(unsigned char *buf, uint32_t len, void *ctx) {
         return;
     }
     
-    // Copy to vector and push to queue
-    std::vector<uint8_t> buffer(buf, buf + len);
-    g_buffer_queue.push(std::move(buffer));
-    
-    g_samples_captured += len / 2;  // 2 bytes per sample (I + Q)
-    
-    // Check for queue overflow
-    if (g_buffer_queue.size() > NUM_BUFFERS) {
+    // Copy into the ring; if the writer has fallen a full ring behind, the
+    // buffer is dropped and counted
+    if (!g_ring.write(buf, len)) {
         g_overflows++;
+        return;
     }
+    
+    g_samples_captured += len / 2;  // 2 bytes per sample (I + Q)
 }
 
 // Writer thread
@@ -107,13 +129,19 @@ void writer_thread(const std::string& filename) {
         return;
     }
     
-    std::vector<uint8_t> buffer;
+    // Drain in chunks of up to a quarter ring
+    const size_t chunk = std::max<size_t>(g_ring.capacity() / 4, 1);
     
-    while (g_running || g_buffer_queue.size() > 0) {
-        if (g_buffer_queue.pop(buffer, 100)) {
-            outfile.write(reinterpret_cast<char*>(buffer.data()), buffer.size());
-            g_bytes_written += buffer.size();
+    while (g_running || g_ring.used() > 0) {
+        const uint8_t* data;
+        size_t n = g_ring.peek(&data, chunk);
+        if (n == 0) {
+            std::this_thread::sleep_for(std::chrono::milliseconds(1));
+            continue;
         }
+        outfile.write(reinterpret_cast<const char*>(data), n);
+        g_ring.consume(n);
+        g_bytes_written += n;
     }
     
     outfile.close();
@@ -139,7 +167,7 @@ void progress_thread(uint32_t sample_rate, int duration_sec) {
                   << std::fixed << std::setprecision(1)
                   << mb_written << " MB written ("
                   << rate << " MB/s), "
-                  << "Queue: " << g_buffer_queue.size() << ", "
+                  << "Ring: " << g_ring.used() * 100 / g_ring.capacity() << "%, "
                   << "Overflows: " << g_overflows
                   << "     " << std::flush;
     }
@@ -155,6 +183,9 @@ void print_usage(const char* progname) {
               << "  -d <duration>  Capture duration in seconds (default: " << DEFAULT_DURATION << ")\n"
               << "  -o <file>      Output file (required)\n"
               << "  -D <device>    Device index (default: 0)\n"
+              << "  --ring-mb <N>  Sample ring size in MB (default: " << DEFAULT_RING_MB << ")\n"
+              << "  --usb-buf-len <bytes>  USB transfer size, multiple of 512 (default: " << BUFFER_SIZE << ")\n"
+              << "  --usb-buf-count <N>    Number of USB transfers in flight (default: " << NUM_BUFFERS << ")\n"
               << "  -h             Show this help\n"
               << "\nExample:\n"
               << "  " << progname << " -f 137100000 -s 2400000 -g 40 -d 900 -o capture.bin\n";
@@ -167,11 +198,21 @@ int main(int argc, char *argv[]) {
     int gain = DEFAULT_GAIN;
     int duration = DEFAULT_DURATION;
     int device_index = 0;
+    int ring_mb = DEFAULT_RING_MB;
+    uint32_t usb_buf_len = BUFFER_SIZE;
+    uint32_t usb_buf_count = NUM_BUFFERS;
     std::string output_file;
     
     // Parse arguments
+    static const struct option long_options[] = {
+        {"ring-mb",       required_argument, nullptr, 'R'},
+        {"usb-buf-len",   required_argument, nullptr, 'L'},
+        {"usb-buf-count", required_argument, nullptr, 'C'},
+        {"help",          no_argument,       nullptr, 'h'},
+        {nullptr,         0,                 nullptr, 0},
+    };
     int opt;
-    while ((opt = getopt(argc, argv, "f:s:g:d:o:D:h")) != -1) {
+    while ((opt = getopt_long(argc, argv, "f:s:g:d:o:D:h", long_options, nullptr)) != -1) {
         switch (opt) {
             case 'f':
                 frequency = std::stoul(optarg);
@@ -191,6 +232,16 @@ int main(int argc, char *argv[]) {
             case 'D':
                 device_index = std::stoi(optarg);
                 break;
+            case 'R':
+                ring_mb = std::max(1, std::stoi(optarg));
+                break;
+            case 'L':
+                // librtlsdr requires a multiple of 512 bytes
+                usb_buf_len = std::max<uint32_t>(512, std::stoul(optarg) / 512 * 512);
+                break;
+            case 'C':
+                usb_buf_count = std::max<uint32_t>(1, std::stoul(optarg));
+                break;
             case 'h':
             default:
                 print_usage(argv[0]);
@@ -204,6 +255,9 @@ int main(int argc, char *argv[]) {
         return 1;
     }
     
+    // Allocate (and touch) the ring up front so the callback never faults pages in
+    g_ring.init(static_cast<size_t>(ring_mb) * 1024 * 1024);
+    
     // Install signal handlers
     signal(SIGINT, signal_handler);
     signal(SIGTERM, signal_handler);
@@ -230,6 +284,8 @@ int main(int argc, char *argv[]) {
     std::cout << "  Sample rate: " << sample_rate / 1e6 << " MS/s\n";
     std::cout << "  Gain:        " << gain / 10.0 << " dB\n";
     std::cout << "  Duration:    " << duration << " seconds\n";
+    std::cout << "  Ring buffer: " << ring_mb << " MB\n";
+    std::cout << "  USB buffers: " << usb_buf_count << " x " << usb_buf_len << " bytes\n";
     std::cout << "  Output:      " << output_file << "\n";
     
     rtlsdr_set_sample_rate(g_dev, sample_rate);
@@ -257,7 +313,7 @@ int main(int argc, char *argv[]) {
     timer.detach();
     
     // Start async read (blocks until cancelled)
-    rtlsdr_read_async(g_dev, rtlsdr_callback, nullptr, NUM_BUFFERS, BUFFER_SIZE);
+    rtlsdr_read_async(g_dev, rtlsdr_callback, nullptr, usb_buf_count, usb_buf_len);
     
     // Wait for writer to finish
     g_running = false;
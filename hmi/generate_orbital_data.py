@@ -42,6 +42,11 @@ except ImportError as e:
     print("  pip install skyfield numpy")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # =============================================================
 # Ground Station — State College, PA
@@ -291,6 +296,13 @@ def fetch_tles(tle_dir='.', max_age_hours=24):
     return matched, ts
 
 
+def _dumps(obj):
+    """Compact JSON bytes; orjson when installed (numpy values serialize directly)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
 def propagate_positions(satellite, ts, observer, t_start_tt, duration_hours, step_seconds):
     """
     Propagate satellite. Returns position samples for 3D rendering.
@@ -330,16 +342,19 @@ def propagate_positions(satellite, ts, observer, t_start_tt, duration_hours, ste
     return positions
 
 
-def find_passes(satellite, sat_name, ts, observer, t_start_tt, duration_hours, freq_hz=None):
+def find_passes(satellite, sat_name, ts, observer, t_start_tt, duration_hours, freq_hz=None,
+                min_elevation=None):
     """
-    Find passes above MIN_ELEVATION. Includes Doppler if freq_hz is set.
+    Find passes above min_elevation (default MIN_ELEVATION). Includes Doppler if freq_hz is set.
     """
+    if min_elevation is None:
+        min_elevation = MIN_ELEVATION
     t0 = ts.tt_jd(t_start_tt)
     t1 = ts.tt_jd(t_start_tt + duration_hours / 24.0)
 
     try:
         t_events, events = satellite.find_events(
-            observer, t0, t1, altitude_degrees=MIN_ELEVATION
+            observer, t0, t1, altitude_degrees=min_elevation
         )
     except Exception as e:
         print(f"  [WARN] find_events failed for {sat_name}: {e}")
@@ -437,23 +452,32 @@ def compute_doppler_for_pass(satellite, observer, ts, aos_dt, los_dt,
     }
 
 
-def generate_data(duration_hours=24, position_step_sec=30, output_path='orbital_data.json'):
+def generate_data(duration_hours=24, position_step_sec=30, output_path='orbital_data.json',
+                  lat=None, lon=None, elevation_m=None, min_elevation=None, tle_dir='.'):
     """
     Main pipeline: TLE fetch -> propagation -> pass finding -> JSON export.
+    
+    Ground station parameters default to GS_LAT/GS_LON/GS_ELEV/MIN_ELEVATION.
+    TLEs are cached in tle_dir.
     """
+    lat = GS_LAT if lat is None else lat
+    lon = GS_LON if lon is None else lon
+    elevation_m = GS_ELEV if elevation_m is None else elevation_m
+    min_elevation = MIN_ELEVATION if min_elevation is None else min_elevation
+    
     print("=" * 60)
     print("SATCOM - Orbital Data Generator")
     print("=" * 60)
     print(f"Ground Station: State College, PA")
-    print(f"  Lat: {GS_LAT} N  Lon: {GS_LON} E  Elev: {GS_ELEV}m")
+    print(f"  Lat: {lat} N  Lon: {lon} E  Elev: {elevation_m}m")
     print(f"Duration: {duration_hours} hours")
     print(f"Position step: {position_step_sec} seconds")
-    print(f"Min elevation: {MIN_ELEVATION} deg")
+    print(f"Min elevation: {min_elevation} deg")
     print(f"Satellites: {len(TRACKED_SATS)}")
     print()
 
-    matched_sats, ts = fetch_tles()
-    observer = wgs84.latlon(GS_LAT, GS_LON, elevation_m=GS_ELEV)
+    matched_sats, ts = fetch_tles(tle_dir)
+    observer = wgs84.latlon(lat, lon, elevation_m=elevation_m)
 
     t_now = ts.now()
     t_start_tt = t_now.tt
@@ -482,7 +506,8 @@ def generate_data(duration_hours=24, position_step_sec=30, output_path='orbital_
         passes = find_passes(
             satellite, sat_name, ts, observer,
             t_start_tt, duration_hours,
-            freq_hz=sat_info['freq_hz']
+            freq_hz=sat_info['freq_hz'],
+            min_elevation=min_elevation,
         )
         print(f"  {len(passes)} passes")
 
@@ -519,10 +544,10 @@ def generate_data(duration_hours=24, position_step_sec=30, output_path='orbital_
         'position_step_sec': position_step_sec,
         'ground_station': {
             'name': 'State College, PA',
-            'lat': GS_LAT,
-            'lon': GS_LON,
-            'elevation_m': GS_ELEV,
-            'min_elevation_deg': MIN_ELEVATION,
+            'lat': lat,
+            'lon': lon,
+            'elevation_m': elevation_m,
+            'min_elevation_deg': min_elevation,
         },
         'satellites': satellites_data,
     }
@@ -542,8 +567,8 @@ def generate_data(duration_hours=24, position_step_sec=30, output_path='orbital_
     for role, count in sorted(by_role.items()):
         print(f"  {role}: {count} sats")
 
-    with open(output_path, 'w') as f:
-        json.dump(output, f, separators=(',', ':'))
+    with open(output_path, 'wb') as f:
+        f.write(_dumps(output))
 
     file_size_kb = os.path.getsize(output_path) / 1024
     print(f"Output: {output_path} ({file_size_kb:.0f} KB)")
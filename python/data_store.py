@@ -8,7 +8,8 @@ Handles storage and retrieval of mission data for:
 - Performance metrics (SNR, sync rate, decode success)
 - ML training data (features + labels)
 
-Storage format: JSON for simplicity, easily migrated to SQLite later.
+Storage format: JSON for simplicity; the mission log the capture scheduler
+and HMI server share is SQLite (WAL mode).
 
 Author: Luke Waszyn
 Date: February 2026
@@ -16,11 +17,18 @@ Date: February 2026
 
 import os
 import json
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable
 import statistics
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Default data directory
 DATA_DIR = Path('data')
@@ -38,10 +46,43 @@ def ensure_data_dirs():
     (DATA_DIR / 'doppler').mkdir(exist_ok=True)
 
 
+# Fallback encoders for when orjson is missing, built once rather than per
+# call. Records are plain trees, so the circular-reference check is skipped.
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False,
+                                    check_circular=False, default=str)
+_INDENT_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False,
+                                   check_circular=False, default=str)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize to JSON bytes, using orjson when it is installed.
+    
+    Numpy arrays and scalars are serialized directly; other unknown types
+    (including datetimes) fall back to str(), matching json.dumps(default=str).
+    """
+    if orjson is not None:
+        option = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME)
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+    if indent:
+        return _INDENT_ENCODER.encode(obj).encode()
+    return _COMPACT_ENCODER.encode(obj).encode()
+
+
+def json_loads(data: Any) -> Any:
+    """Parse JSON from bytes or str, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def _load_json(filepath: Path) -> List[Dict]:
     """Load JSON file, return empty list if doesn't exist."""
     if filepath.exists():
-        with open(filepath, 'r') as f:
+        with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     return []
 
@@ -49,8 +90,44 @@ def _load_json(filepath: Path) -> List[Dict]:
 def _save_json(filepath: Path, data: List[Dict]):
     """Save data to JSON file."""
     filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2, default=str)
+    with open(filepath, 'wb') as f:
+        f.write(json_dumps(data, indent=True))
+
+
+def iter_ndjson(filepath: Path):
+    """Yield records from a newline-delimited JSON file, skipping bad lines."""
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def apply_mission_events(records: Iterable[Dict]) -> List[Dict]:
+    """
+    Fold follow-up event records (e.g. 'decode_complete') into the mission
+    records they refer to by 'mission_id'.
+    
+    Returns only the mission records, in their original order. Events whose
+    mission is not in `records` are dropped.
+    """
+    missions = []
+    by_id = {}
+    for record in records:
+        event = record.get('event')
+        if event is None:
+            missions.append(record)
+            if 'id' in record:
+                by_id[record['id']] = record
+        elif event == 'decode_complete' and record.get('mission_id') in by_id:
+            by_id[record['mission_id']].update(
+                (k, v) for k, v in record.items() if k not in ('event', 'mission_id', 'timestamp')
+            )
+    return missions
 
 
 # ============================================================
@@ -150,6 +227,181 @@ def get_mission_count() -> Dict[str, int]:
     }
 
 
+# ============================================================
+# MISSION LOG DATABASE
+# ============================================================
+
+MISSION_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    id INTEGER PRIMARY KEY,
+    mission_id TEXT UNIQUE,
+    ts TEXT,
+    satellite TEXT,
+    aos TEXT,
+    max_el REAL,
+    capture_file TEXT,
+    decoded_image TEXT,
+    status TEXT,
+    json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ts ON missions(ts DESC);
+"""
+
+
+def _mission_status(entry: Dict) -> str:
+    """Short outcome label for a mission record."""
+    if entry.get('decode_success'):
+        return 'decoded'
+    if entry.get('decode_pending'):
+        return 'decoding'
+    if entry.get('capture_success'):
+        return 'captured'
+    return 'failed'
+
+
+class MissionDB:
+    """
+    Mission log in SQLite (WAL mode), shared by the capture scheduler and the
+    HMI server.
+    
+    Inserts are O(1) and recent-mission queries use the timestamp index, so
+    neither slows down as the log grows. One connection is shared between
+    threads; calls are serialized with a lock.
+    """
+    
+    def __init__(self, db_path: Path):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(MISSION_DB_SCHEMA)
+    
+    def _row(self, entry: Dict) -> tuple:
+        return (
+            entry.get('id'),
+            entry.get('timestamp'),
+            entry.get('satellite'),
+            entry.get('aos_utc'),
+            entry.get('max_elevation_deg'),
+            entry.get('capture_file'),
+            entry.get('decoded_image') or entry.get('image_file'),
+            _mission_status(entry),
+            json_dumps(entry).decode(),
+        )
+    
+    def insert(self, entry: Dict) -> Dict:
+        """
+        Add a mission record. Records with an 'id' can be updated later;
+        ids must be unique (sqlite3.IntegrityError otherwise).
+        """
+        self._insert(self._row(entry))
+        return entry
+    
+    def _insert(self, row: tuple):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO missions (mission_id, ts, satellite, aos, max_el, '
+                'capture_file, decoded_image, status, json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                row,
+            )
+    
+    def update(self, mission_id: str, fields: Dict) -> Optional[Dict]:
+        """Merge fields into the mission with this id. Returns the updated record."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT json FROM missions WHERE mission_id = ?', (mission_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute('COMMIT')
+                    return None
+                entry = json.loads(row[0])
+                entry.update(fields)
+                self._conn.execute(
+                    'UPDATE missions SET mission_id = ?, ts = ?, satellite = ?, aos = ?, '
+                    'max_el = ?, capture_file = ?, decoded_image = ?, status = ?, json = ? '
+                    'WHERE mission_id = ?',
+                    self._row(entry) + (mission_id,),
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return entry
+    
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        """The latest `limit` missions (all if None), oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT json FROM missions ORDER BY ts DESC, id DESC LIMIT ?',
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+    
+    def import_records(self, records: Iterable[Dict]) -> int:
+        """
+        Bulk-load older mission log records (events folded in).
+        
+        A record whose id is already taken keeps it in its JSON but is stored
+        without a mission_id, so nothing is overwritten. Returns the count.
+        """
+        count = 0
+        for entry in apply_mission_events(records):
+            row = self._row(entry)
+            try:
+                self._insert(row)
+            except sqlite3.IntegrityError:
+                self._insert((None,) + row[1:])
+            count += 1
+        return count
+
+
+_MISSION_DBS: Dict[Path, MissionDB] = {}
+_MISSION_DBS_LOCK = threading.Lock()
+
+
+def get_mission_db(data_dir: Path = DATA_DIR) -> MissionDB:
+    """
+    Open (once per process) the mission database in data_dir.
+    
+    When the database is first created, an older mission_log.ndjson (renamed
+    to <name>.migrated afterwards) or else mission_log.json (left in place)
+    found there is imported into it.
+    """
+    data_dir = Path(data_dir)
+    key = data_dir.resolve()
+    with _MISSION_DBS_LOCK:
+        db = _MISSION_DBS.get(key)
+        if db is None:
+            db_path = data_dir / 'missions.sqlite'
+            fresh = not db_path.exists()
+            db = MissionDB(db_path)
+            if fresh:
+                _import_legacy_mission_log(db, data_dir)
+            _MISSION_DBS[key] = db
+        return db
+
+
+def _import_legacy_mission_log(db: MissionDB, data_dir: Path):
+    """Import mission_log.ndjson or mission_log.json from data_dir into db."""
+    ndjson_path = data_dir / 'mission_log.ndjson'
+    json_path = data_dir / 'mission_log.json'
+    if ndjson_path.exists():
+        db.import_records(iter_ndjson(ndjson_path))
+        ndjson_path.rename(ndjson_path.with_name(ndjson_path.name + '.migrated'))
+    elif json_path.exists():
+        try:
+            records = _load_json(json_path)
+        except (OSError, ValueError):
+            records = []
+        db.import_records(records)
+
+
 # ============================================================
 # PERFORMANCE METRICS
 # ============================================================
@@ -26,6 +26,12 @@ import os
 import json
 from datetime import datetime
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional; without it the NumPy implementations are used
+    njit = None
+
 # APT Format Constants
 APT_LINES_PER_SEC = 2
 APT_PIXELS_PER_LINE = 2080
@@ -88,6 +94,24 @@ def load_iq(filepath):
         raise ValueError(f"Unsupported file format: {ext}")
 
 
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fm_discriminator(iq):
+        """Compiled quadrature discriminator; no complex temporaries."""
+        n = max(iq.shape[0] - 1, 0)
+        out = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            a = iq[i + 1]
+            b = iq[i]
+            # angle(a * conj(b))
+            re = a.real * b.real + a.imag * b.imag
+            im = a.imag * b.real - a.real * b.imag
+            out[i] = np.arctan2(im, re)
+        return out
+else:
+    _fm_discriminator = None
+
+
 def fm_demodulate(iq):
     """
     FM demodulation using quadrature discriminator.
@@ -97,6 +121,9 @@ def fm_demodulate(iq):
     For discrete samples:
     freq[n] = angle(iq[n] * conj(iq[n-1]))
     """
+    if _fm_discriminator is not None:
+        return _fm_discriminator(np.ascontiguousarray(iq, dtype=np.complex64))
+    
     # Quadrature discriminator
     # Multiply each sample by conjugate of previous sample
     # Phase difference = instantaneous frequency
@@ -181,22 +208,20 @@ def find_sync_pulses(data, sample_rate):
 def extract_lines(data, sync_positions, samples_per_line):
     """
     Extract image lines starting from sync positions.
+    
+    All complete lines are gathered into one 2-D array and resampled to
+    APT_PIXELS_PER_LINE in a single call.
     """
-    lines = []
+    starts = np.asarray(sync_positions, dtype=np.int64)
+    starts = starts[starts + samples_per_line <= len(data)]
     
-    for i, start in enumerate(sync_positions):
-        end = start + samples_per_line
-        
-        if end > len(data):
-            break
-            
-        line = data[start:end]
-        
-        # Resample line to exactly APT_PIXELS_PER_LINE pixels
-        line_resampled = signal.resample(line, APT_PIXELS_PER_LINE)
-        lines.append(line_resampled)
+    if len(starts) == 0:
+        return np.empty((0, APT_PIXELS_PER_LINE))
+    
+    lines = data[starts[:, None] + np.arange(samples_per_line)]
     
-    return np.array(lines)
+    # Resample each line to exactly APT_PIXELS_PER_LINE pixels
+    return signal.resample(lines, APT_PIXELS_PER_LINE, axis=1)
 
 
 def normalize_image(image):
@@ -21,6 +21,7 @@ Date: February 2026
 import numpy as np
 from skyfield.api import load, wgs84, EarthSatellite
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
 
@@ -40,8 +41,12 @@ OBSERVER_LAT = 40.7934
 OBSERVER_LON = -77.8600
 OBSERVER_ELEV = 376  # meters
 
+# Computed profiles are cached here, keyed by satellite/AOS/LOS/step/frequency
+DOPPLER_CACHE_DIR = os.path.join('data', 'doppler', 'cache')
+TLE_FILE = 'weather.txt'
 
-def load_satellite(sat_name, tle_file='weather.txt'):
+
+def load_satellite(sat_name, tle_file=TLE_FILE):
     """Load satellite from TLE file."""
     ts = load.timescale()
     
@@ -62,23 +67,25 @@ def load_satellite(sat_name, tle_file='weather.txt'):
     raise ValueError(f"Satellite {sat_name} not found. Available: {list(by_name.keys())[:10]}")
 
 
-def calculate_doppler_profile(sat_name, aos_time, los_time, time_step_sec=1.0, center_freq_hz=None):
+def calculate_doppler_profile(sat_name, aos_time, los_time, time_step_sec=1.0, center_freq_hz=None,
+                              use_cache=True):
     """
     Calculate Doppler shift profile for a satellite pass.
     
+    Profiles are memoized on disk in DOPPLER_CACHE_DIR; a cached profile is
+    reused unless the TLE file has been updated since it was written.
+    
     Args:
         sat_name: Satellite name (e.g., 'NOAA 18')
         aos_time: Acquisition of signal time (datetime, UTC)
         los_time: Loss of signal time (datetime, UTC)
         time_step_sec: Time resolution in seconds
         center_freq_hz: Transmit frequency (auto-detected if None)
+        use_cache: Read/write the on-disk profile cache
     
     Returns:
         Dictionary with time and frequency arrays
     """
-    # Load satellite
-    satellite, ts = load_satellite(sat_name)
-    
     # Get transmit frequency
     if center_freq_hz is None:
         for key in NOAA_FREQUENCIES:
@@ -88,6 +95,66 @@ def calculate_doppler_profile(sat_name, aos_time, los_time, time_step_sec=1.0, c
         else:
             center_freq_hz = 137.5e6  # Default to mid-band
     
+    if not use_cache:
+        return _compute_doppler_profile(sat_name, aos_time, los_time, time_step_sec, center_freq_hz)
+    
+    key = hashlib.sha256(
+        f"{sat_name}|{aos_time.isoformat()}|{los_time.isoformat()}|{time_step_sec}|{int(center_freq_hz)}".encode()
+    ).hexdigest()[:16]
+    cache_path = os.path.join(DOPPLER_CACHE_DIR, f"{sat_name.replace(' ', '_')}_{key}.json")
+    
+    try:
+        tle_mtime = os.path.getmtime(TLE_FILE)
+    except OSError:
+        tle_mtime = 0.0
+    try:
+        if os.path.getmtime(cache_path) >= tle_mtime:
+            with open(cache_path, 'r') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    
+    profile = _compute_doppler_profile(sat_name, aos_time, los_time, time_step_sec, center_freq_hz)
+    _write_cached_profile(cache_path, profile, tle_mtime)
+    
+    return profile
+
+
+def _write_cached_profile(cache_path, profile, tle_mtime):
+    """
+    Store a profile in the cache and prune entries older than the TLE file.
+    
+    Best effort: a read-only or full data directory only costs the cache.
+    """
+    tmp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(DOPPLER_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not cache Doppler profile: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    
+    # Profiles computed from an older TLE set are never reused
+    try:
+        with os.scandir(DOPPLER_CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.stat().st_mtime < tle_mtime:
+                    os.remove(entry.path)
+    except OSError:
+        pass
+
+
+def _compute_doppler_profile(sat_name, aos_time, los_time, time_step_sec, center_freq_hz):
+    """Propagate the pass and compute the Doppler profile (uncached)."""
+    # Load satellite
+    satellite, ts = load_satellite(sat_name)
+    
     # Observer position
     observer = wgs84.latlon(OBSERVER_LAT, OBSERVER_LON, elevation_m=OBSERVER_ELEV)
     
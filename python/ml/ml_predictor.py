@@ -111,11 +111,12 @@ class MissionPredictor:
     
     def _predict_ml(self, features: Dict) -> Dict:
         """Make prediction using ML model."""
-        import pandas as pd
-        import numpy as np
-        
+        return self._predict_ml_batch([features])[0]
+    
+    def _predict_ml_batch(self, features_list: List[Dict]) -> List[Dict]:
+        """Make predictions for many feature sets with one model call."""
         # Convert to DataFrame
-        df = features_to_dataframe([features])
+        df = features_to_dataframe(features_list)
         df = impute_missing(df)
         
         # Ensure columns match training
@@ -127,41 +128,46 @@ class MissionPredictor:
             # Select only training columns
             df = df[self.feature_names]
         
-        # Predict probability
+        # Predict probability for all rows at once
         if hasattr(self.classifier, 'predict_proba'):
-            proba = self.classifier.predict_proba(df)[0]
-            success_prob = proba[1] if len(proba) > 1 else proba[0]
+            proba = self.classifier.predict_proba(df)
+            success_probs = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
         else:
-            pred = self.classifier.predict(df)[0]
-            success_prob = float(pred)
+            success_probs = self.classifier.predict(df).astype(float)
         
         # Predict SNR if regressor available
-        predicted_snr = None
+        predicted_snrs = [None] * len(df)
         if self.regressor is not None:
             try:
-                predicted_snr = float(self.regressor.predict(df)[0])
-            except:
+                predicted_snrs = [float(v) for v in self.regressor.predict(df)]
+            except Exception:
                 pass
         
-        # Confidence based on probability distance from 0.5
-        confidence = abs(success_prob - 0.5) * 2
+        model_version = self.metadata.get('version', 'unknown') if self.metadata else 'unknown'
         
-        # Recommendation
-        if success_prob >= 0.7:
-            recommendation = 'capture'
-        elif success_prob >= 0.4:
-            recommendation = 'marginal'
-        else:
-            recommendation = 'skip'
+        predictions = []
+        for success_prob, predicted_snr in zip(success_probs, predicted_snrs):
+            # Confidence based on probability distance from 0.5
+            confidence = abs(success_prob - 0.5) * 2
+            
+            # Recommendation
+            if success_prob >= 0.7:
+                recommendation = 'capture'
+            elif success_prob >= 0.4:
+                recommendation = 'marginal'
+            else:
+                recommendation = 'skip'
+            
+            predictions.append({
+                'success_probability': float(success_prob),
+                'predicted_snr_db': predicted_snr,
+                'confidence': float(confidence),
+                'method': 'ml',
+                'recommendation': recommendation,
+                'model_version': model_version,
+            })
         
-        return {
-            'success_probability': float(success_prob),
-            'predicted_snr_db': predicted_snr,
-            'confidence': float(confidence),
-            'method': 'ml',
-            'recommendation': recommendation,
-            'model_version': self.metadata.get('version', 'unknown') if self.metadata else 'unknown',
-        }
+        return predictions
     
     def _predict_rules(self, pass_info: Dict, weather: Optional[Dict]) -> Dict:
         """Fall back to rule-based scoring."""
@@ -193,17 +199,29 @@ class MissionPredictor:
     def predict_batch(self,
                       passes: List[Dict],
                       weather: Optional[Dict] = None,
-                      config: Optional[Dict] = None) -> List[Dict]:
+                      config: Optional[Dict] = None,
+                      include_pass_info: bool = True) -> List[Dict]:
         """
         Predict outcomes for multiple passes.
         
-        Returns list of predictions in same order as input.
+        With a trained model, features for all passes are stacked into one
+        frame and scored with a single predict_proba call.
+        
+        Returns list of predictions in same order as input, each with its
+        pass under 'pass_info' unless include_pass_info is False.
         """
-        predictions = []
-        for p in passes:
-            pred = self.predict(p, weather, config)
-            pred['pass_info'] = p
-            predictions.append(pred)
+        if not passes:
+            return []
+        
+        if self.using_ml and self.classifier is not None:
+            features_list = [extract_all_features(p, weather, config) for p in passes]
+            predictions = self._predict_ml_batch(features_list)
+        else:
+            predictions = [self._predict_rules(p, weather) for p in passes]
+        
+        if include_pass_info:
+            for pred, p in zip(predictions, passes):
+                pred['pass_info'] = p
         return predictions
     
     def rank_passes(self,
@@ -23,6 +23,9 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from python.ml.feature_engineering import extract_all_features
 
@@ -115,46 +118,55 @@ def score_weather(cloud_cover_pct: Optional[float] = None,
     return max(0.0, score)
 
 
+def recent_aos_hours(recent_passes: Optional[List[Dict]] = None) -> np.ndarray:
+    """
+    Extract AOS hours (UTC) of the last 5 recent passes in one vectorized parse.
+    
+    Entries without a parseable 'aos_time' are dropped.
+    
+    Returns: float array of hours, oldest first
+    """
+    if not recent_passes:
+        return np.empty(0)
+    
+    times = pd.to_datetime([r.get('aos_time') for r in recent_passes[-5:]],
+                           utc=True, format='ISO8601', errors='coerce')
+    hours = times.hour.to_numpy(dtype=float)
+    return hours[~np.isnan(hours)]
+
+
 def score_time_diversity(aos_hour_utc: float, 
-                         recent_passes: Optional[List[Dict]] = None) -> float:
+                         recent_hours: Optional[np.ndarray] = None) -> float:
     """
     Score based on time diversity.
     
     Prefer passes at different times than recent captures
     to get variety in training data.
     
+    Args:
+        aos_hour_utc: AOS hour of the candidate pass
+        recent_hours: AOS hours of recent captures (see recent_aos_hours)
+    
     Returns: 0.0 to 1.0
     """
-    if recent_passes is None or len(recent_passes) == 0:
+    if recent_hours is None or len(recent_hours) == 0:
         return 0.8  # No history, neutral score
     
-    # Check if we've captured at similar times recently
-    for recent in recent_passes[-5:]:  # Last 5 passes
-        recent_hour = None
-        if 'aos_time' in recent:
-            aos = recent['aos_time']
-            if isinstance(aos, str):
-                aos = datetime.fromisoformat(aos.replace('Z', '+00:00'))
-            if hasattr(aos, 'hour'):
-                recent_hour = aos.hour
-        
-        if recent_hour is not None:
-            hour_diff = abs(aos_hour_utc - recent_hour)
-            if hour_diff > 12:
-                hour_diff = 24 - hour_diff
-            
-            # If very similar time, reduce score
-            if hour_diff < 2:
-                return 0.4
-            elif hour_diff < 4:
-                return 0.7
-    
-    return 1.0
+    # Circular hour distance to each recent capture
+    hour_diff = np.abs(aos_hour_utc - recent_hours)
+    hour_diff = np.minimum(hour_diff, 24 - hour_diff)
+    
+    # The first recent capture at a similar time decides the penalty
+    close = np.flatnonzero(hour_diff < 4)
+    if close.size == 0:
+        return 1.0
+    return 0.4 if hour_diff[close[0]] < 2 else 0.7
 
 
 def score_pass(pass_info: Dict,
                weather: Optional[Dict] = None,
-               recent_passes: Optional[List[Dict]] = None) -> Tuple[float, Dict]:
+               recent_passes: Optional[List[Dict]] = None,
+               recent_hours: Optional[np.ndarray] = None) -> Tuple[float, Dict]:
     """
     Calculate overall score for a satellite pass.
     
@@ -162,6 +174,7 @@ def score_pass(pass_info: Dict,
         pass_info: Pass data with elevation, duration, times
         weather: Weather data (optional)
         recent_passes: Recent capture history (optional)
+        recent_hours: Precomputed recent_aos_hours(recent_passes) (optional)
     
     Returns:
         Tuple of (score, breakdown)
@@ -178,9 +191,11 @@ def score_pass(pass_info: Dict,
         features.get('cloud_cover_pct'),
         features.get('precipitation_prob')
     )
+    if recent_hours is None:
+        recent_hours = recent_aos_hours(recent_passes)
     div_score = score_time_diversity(
         features['aos_hour_utc'],
-        recent_passes
+        recent_hours
     )
     
     # Weighted combination
@@ -219,8 +234,11 @@ def rank_passes(passes: List[Dict],
     """
     scored = []
     
+    # Parse recent capture times once for the whole ranking
+    recent_hours = recent_aos_hours(recent_passes)
+    
     for p in passes:
-        score, breakdown = score_pass(p, weather, recent_passes)
+        score, breakdown = score_pass(p, weather, recent_passes, recent_hours)
         scored.append((p, score, breakdown))
     
     # Sort by score descending
@@ -15,17 +15,33 @@ Author: Luke Waszyn
 Date: February 2026
 """
 
+import copy
+import json
 import os
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; without it the selection kernel runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from python.ml.ml_predictor import get_predictor, predict_success
 from python.ml.pass_scorer import score_pass
 from python.schedule_captures import get_upcoming_passes
+from python.predict_passes import TLE_FILE
 
 
 # Schedule constraints
@@ -35,8 +51,132 @@ CONSTRAINTS = {
     'min_success_probability': 0.3, # Skip low-probability passes
     'prefer_diversity': True,       # Try different satellites
     'max_consecutive_same_sat': 3,  # Max same satellite in a row
+    'min_elevation_deg': 15,        # Passes below this are never predicted
 }
 
+# generate_schedule memoization: results are reused within one time bucket
+# while the TLE file, weather and config are unchanged
+SCHEDULE_CACHE_BUCKET_SEC = 600
+SCHEDULE_CACHE_SIZE = 4
+
+# Shared by every ScheduleOptimizer, since the module-level helpers build a
+# fresh optimizer per call
+_SCHEDULE_CACHE: 'OrderedDict[Tuple, List[ScheduledPass]]' = OrderedDict()
+_SCHEDULE_CACHE_LOCK = threading.Lock()
+
+@dataclass
+class ScheduledPass:
+    """A pass accepted into the capture schedule."""
+    __slots__ = ('pass_', 'prediction', 'scheduled_aos', 'scheduled_los')
+    
+    pass_: Dict             # Pass data from get_upcoming_passes
+    prediction: Dict        # Predictor output for the pass
+    scheduled_aos: str      # Naive UTC ISO timestamp
+    scheduled_los: str      # Naive UTC ISO timestamp
+
+
+def _naive_utc(t) -> datetime:
+    """Normalize an ISO string or datetime to a naive UTC datetime."""
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t.replace('Z', '+00:00'))
+    return t.replace(tzinfo=None)
+
+
+def _pass_epochs(p: Dict) -> Tuple[int, int]:
+    """
+    AOS/LOS of a pass as integer UTC epoch seconds.
+    
+    Uses the aos_epoch/los_epoch fields from get_upcoming_passes when present
+    and only parses aos_time/los_time for passes from other sources.
+    """
+    if 'aos_epoch' in p and 'los_epoch' in p:
+        return p['aos_epoch'], p['los_epoch']
+    aos = _naive_utc(p['aos_time']).replace(tzinfo=timezone.utc)
+    los = _naive_utc(p['los_time']).replace(tzinfo=timezone.utc)
+    return int(aos.timestamp()), int(los.timestamp())
+
+
+def _epoch_to_iso(epoch: int) -> str:
+    """Format epoch seconds as a naive UTC ISO string."""
+    return datetime.fromtimestamp(int(epoch), timezone.utc).replace(tzinfo=None).isoformat()
+
+
+@njit(cache=True)
+def _greedy_select(order, aos_s, los_s, sat_ids, days,
+                   min_gap, max_per_day, max_consecutive):
+    """
+    Numeric core of the schedule greedy.
+    
+    Walks candidate indices in `order` (best first) and commits each pass that
+    respects the per-day cap, the minimum gap to its committed neighbours and
+    the consecutive-satellite limit. Committed passes are kept sorted by AOS.
+    
+    Args:
+        order: Candidate pass indices, best first
+        aos_s, los_s: AOS/LOS epoch seconds per pass
+        sat_ids: Integer satellite id per pass
+        days: Day index per pass (0-based)
+        min_gap: Minimum gap between captures in seconds
+        max_per_day: Maximum captures per day
+        max_consecutive: Maximum same-satellite run in time order
+    
+    Returns:
+        Indices of committed passes in AOS order
+    """
+    n = order.shape[0]
+    starts = np.empty(n, dtype=np.int64)
+    ends = np.empty(n, dtype=np.int64)
+    sats = np.empty(n, dtype=np.int64)
+    picked = np.empty(n, dtype=np.int64)
+    captures_by_day = np.zeros(days.max() + 1, dtype=np.int64)
+    count = 0
+    
+    for o in range(n):
+        i = order[o]
+        start = aos_s[i]
+        end = los_s[i]
+        sat = sat_ids[i]
+        
+        # Check max captures per day
+        if captures_by_day[days[i]] >= max_per_day:
+            continue
+        
+        # Check minimum gap to the committed neighbours on both sides
+        k = np.searchsorted(starts[:count], start, side='right')
+        if k > 0 and start - ends[k - 1] < min_gap:
+            continue
+        if k < count and starts[k] - end < min_gap:
+            continue
+        
+        # Check satellite diversity: length of the same-satellite run
+        # this pass would join in time order
+        run = 1
+        j = k - 1
+        while j >= 0 and sats[j] == sat:
+            run += 1
+            j -= 1
+        j = k
+        while j < count and sats[j] == sat:
+            run += 1
+            j += 1
+        if run > max_consecutive:
+            continue
+        
+        # Pass all constraints - insert at position k
+        for j in range(count, k, -1):
+            starts[j] = starts[j - 1]
+            ends[j] = ends[j - 1]
+            sats[j] = sats[j - 1]
+            picked[j] = picked[j - 1]
+        starts[k] = start
+        ends[k] = end
+        sats[k] = sat
+        picked[k] = i
+        count += 1
+        captures_by_day[days[i]] += 1
+    
+    return picked[:count]
+
 
 class ScheduleOptimizer:
     """
@@ -47,13 +187,36 @@ class ScheduleOptimizer:
         self.constraints = {**CONSTRAINTS, **(constraints or {})}
         self.predictor = get_predictor()
     
+    def invalidate(self):
+        """Drop memoized schedules (e.g. after a TLE or model update)."""
+        with _SCHEDULE_CACHE_LOCK:
+            _SCHEDULE_CACHE.clear()
+    
+    def _cache_key(self, hours_ahead, weather, config) -> Tuple:
+        try:
+            tle_mtime = os.path.getmtime(TLE_FILE)
+        except OSError:
+            tle_mtime = None
+        return (
+            hours_ahead,
+            int(time.time()) // SCHEDULE_CACHE_BUCKET_SEC,
+            tle_mtime,
+            json.dumps(self.constraints, sort_keys=True, default=str),
+            json.dumps(weather, sort_keys=True, default=str),
+            json.dumps(config, sort_keys=True, default=str),
+        )
+    
     def generate_schedule(self,
                           hours_ahead: int = 48,
                           weather: Optional[Dict] = None,
-                          config: Optional[Dict] = None) -> List[Dict]:
+                          config: Optional[Dict] = None) -> List[ScheduledPass]:
         """
         Generate optimized capture schedule.
         
+        Results are memoized (across optimizers) for up to
+        SCHEDULE_CACHE_BUCKET_SEC per set of inputs and constraints; call
+        invalidate() to force a rebuild. Callers get their own copy.
+        
         Args:
             hours_ahead: How far ahead to schedule
             weather: Weather data (optional)
@@ -62,16 +225,39 @@ class ScheduleOptimizer:
         Returns:
             List of scheduled captures with predictions
         """
-        # Get upcoming passes
-        passes = get_upcoming_passes(hours_ahead=hours_ahead, min_elevation=15)
+        key = self._cache_key(hours_ahead, weather, config)
+        with _SCHEDULE_CACHE_LOCK:
+            cached = _SCHEDULE_CACHE.get(key)
+            if cached is not None:
+                _SCHEDULE_CACHE.move_to_end(key)
+                return copy.deepcopy(cached)
+        
+        schedule = self._build_schedule(hours_ahead, weather, config)
+        
+        with _SCHEDULE_CACHE_LOCK:
+            _SCHEDULE_CACHE[key] = schedule
+            _SCHEDULE_CACHE.move_to_end(key)
+            while len(_SCHEDULE_CACHE) > SCHEDULE_CACHE_SIZE:
+                _SCHEDULE_CACHE.popitem(last=False)
+        
+        return copy.deepcopy(schedule)
+    
+    def _build_schedule(self,
+                        hours_ahead: int,
+                        weather: Optional[Dict],
+                        config: Optional[Dict]) -> List[ScheduledPass]:
+        """Predict, score and constrain upcoming passes (uncached)."""
+        # Get upcoming passes; the elevation threshold is applied here, so
+        # passes below it never reach the predictor
+        passes = get_upcoming_passes(hours_ahead=hours_ahead,
+                                     min_elevation=self.constraints['min_elevation_deg'])
         
         if not passes:
             return []
         
-        # Score all passes
+        predictions = self._predict_all(passes, weather, config)
         scored_passes = []
-        for p in passes:
-            pred = self.predictor.predict(p, weather, config)
+        for p, pred in zip(passes, predictions):
             scored_passes.append({
                 'pass': p,
                 'prediction': pred,
@@ -86,79 +272,71 @@ class ScheduleOptimizer:
         
         return schedule
     
-    def _apply_constraints(self, scored_passes: List[Dict]) -> List[Dict]:
+    def _predict_all(self,
+                     passes: List[Dict],
+                     weather: Optional[Dict],
+                     config: Optional[Dict]) -> List[Dict]:
+        """
+        Predict every pass with one batched predictor call.
+        
+        Predictions match predict(): ScheduledPass already holds the pass, so
+        no 'pass_info' copy is attached.
+        """
+        return self.predictor.predict_batch(passes, weather, config, include_pass_info=False)
+    
+    def _apply_constraints(self, scored_passes: List[Dict]) -> List[ScheduledPass]:
         """
         Apply scheduling constraints.
         
-        Greedy algorithm: take highest-scoring passes that satisfy constraints.
+        Greedy interval scheduling: candidates are taken in score order and
+        committed into a time-sorted list, so gap and consecutive-satellite
+        checks hold in time order. Inputs are flattened to integer arrays
+        and the loop itself runs in _greedy_select (Numba-compiled when
+        available).
         """
-        schedule = []
-        captures_by_day = {}
-        consecutive_same_sat = 0
-        last_satellite = None
-        last_end_time = None
-        
-        for item in scored_passes:
-            p = item['pass']
-            pred = item['prediction']
-            
-            # Skip low probability
-            if pred['success_probability'] < self.constraints['min_success_probability']:
-                continue
-            
-            # Parse times
-            aos = p['aos_time']
-            los = p['los_time']
-            
-            if isinstance(aos, str):
-                aos = datetime.fromisoformat(aos.replace('Z', '+00:00')).replace(tzinfo=None)
-            if isinstance(los, str):
-                los = datetime.fromisoformat(los.replace('Z', '+00:00')).replace(tzinfo=None)
-            if hasattr(aos, 'tzinfo') and aos.tzinfo:
-                aos = aos.replace(tzinfo=None)
-            if hasattr(los, 'tzinfo') and los.tzinfo:
-                los = los.replace(tzinfo=None)
-            
-            # Check minimum gap
-            if last_end_time is not None:
-                gap = (aos - last_end_time).total_seconds() / 60
-                if gap < self.constraints['min_gap_minutes']:
-                    continue
-            
-            # Check max captures per day
-            day_key = aos.strftime('%Y-%m-%d')
-            day_count = captures_by_day.get(day_key, 0)
-            if day_count >= self.constraints['max_captures_per_day']:
-                continue
-            
-            # Check satellite diversity
-            satellite = p.get('satellite', '')
-            if satellite == last_satellite:
-                consecutive_same_sat += 1
-                if consecutive_same_sat >= self.constraints['max_consecutive_same_sat']:
-                    continue
-            else:
-                consecutive_same_sat = 0
-            
-            # Pass all constraints - add to schedule
-            schedule.append({
-                'pass': p,
-                'prediction': pred,
-                'scheduled_aos': aos.isoformat(),
-                'scheduled_los': los.isoformat(),
-            })
-            
-            # Update state
-            last_end_time = los
-            last_satellite = satellite
-            captures_by_day[day_key] = day_count + 1
+        if not scored_passes:
+            return []
         
-        # Sort schedule by time
-        schedule.sort(key=lambda x: x['scheduled_aos'])
+        # Integer epoch seconds for all passes; day key is epoch // 86400
+        epochs = np.array([_pass_epochs(item['pass']) for item in scored_passes],
+                          dtype=np.int64)
+        aos_s, los_s = epochs[:, 0], epochs[:, 1]
+        days = aos_s // 86400
+        days -= days.min()
         
-        return schedule
+        # Satellites as integer ids
+        _, sat_ids = np.unique([item['pass'].get('satellite', '') for item in scored_passes],
+                               return_inverse=True)
+        
+        # Highest score first (ties go to the earlier pass). Passes above the
+        # probability threshold form a prefix of this order, so the cutoff is
+        # a binary search rather than a per-row comparison.
+        neg_probs = -np.fromiter((item['score'] for item in scored_passes),
+                                 dtype=float, count=len(scored_passes))
+        order = np.lexsort((aos_s, neg_probs))
+        cutoff = np.searchsorted(neg_probs[order],
+                                 -self.constraints['min_success_probability'],
+                                 side='right')
+        order = order[:cutoff]
+        
+        picked = _greedy_select(
+            order, aos_s, los_s, sat_ids.astype(np.int64), days,
+            int(self.constraints['min_gap_minutes'] * 60),
+            int(self.constraints['max_captures_per_day']),
+            int(self.constraints['max_consecutive_same_sat']),
+        )
+        
+        return [
+            ScheduledPass(
+                pass_=scored_passes[i]['pass'],
+                prediction=scored_passes[i]['prediction'],
+                scheduled_aos=_epoch_to_iso(aos_s[i]),
+                scheduled_los=_epoch_to_iso(los_s[i]),
+            )
+            for i in picked
+        ]
     
-    def get_schedule_summary(self, schedule: List[Dict]) -> Dict:
+    def get_schedule_summary(self, schedule: List[ScheduledPass]) -> Dict:
         """
         Generate summary statistics for a schedule.
         """
@@ -166,17 +344,23 @@ class ScheduleOptimizer:
             return {'total': 0}
         
         total = len(schedule)
-        expected_successes = sum(s['prediction']['success_probability'] for s in schedule)
-        
-        satellites = set(s['pass'].get('satellite', 'unknown') for s in schedule)
-        
+        expected_successes = 0.0
+        total_elevation = 0.0
         by_recommendation = {'capture': 0, 'marginal': 0, 'skip': 0}
+        satellites: Dict[str, None] = {}    # insertion-ordered set of names
+        
+        # Single walk over the schedule for every accumulator
         for s in schedule:
-            rec = s['prediction'].get('recommendation', 'unknown')
+            pred = s.prediction
+            p = s.pass_
+            expected_successes += pred['success_probability']
+            total_elevation += p.get('max_elevation', 0)
+            satellites[p.get('satellite', 'unknown')] = None
+            rec = pred.get('recommendation', 'unknown')
             if rec in by_recommendation:
                 by_recommendation[rec] += 1
         
-        avg_elevation = sum(s['pass'].get('max_elevation', 0) for s in schedule) / total
+        avg_elevation = total_elevation / total
         
         return {
             'total_passes': total,
@@ -188,7 +372,7 @@ class ScheduleOptimizer:
             'avg_elevation': round(avg_elevation, 1),
         }
     
-    def print_schedule(self, schedule: List[Dict]):
+    def print_schedule(self, schedule: List[ScheduledPass]):
         """Print formatted schedule."""
         print("\n" + "=" * 70)
         print("OPTIMIZED CAPTURE SCHEDULE")
@@ -206,28 +390,24 @@ class ScheduleOptimizer:
         print(f"  Expected success rate: {summary['expected_success_rate']:.0%}")
         print(f"  Satellites: {', '.join(summary['satellites'])}")
         
-        print(f"\nSchedule:")
-        print("-" * 70)
+        # Build the listing and write it in one call
+        parts: List[str] = ["\nSchedule:", "-" * 70]
         
         current_day = None
         
-        for i, item in enumerate(schedule, 1):
-            p = item['pass']
-            pred = item['prediction']
-            
-            aos = item['scheduled_aos']
-            if isinstance(aos, str):
-                aos_dt = datetime.fromisoformat(aos)
-            else:
-                aos_dt = aos
+        for item in schedule:
+            p = item.pass_
+            pred = item.prediction
             
-            day = aos_dt.strftime('%Y-%m-%d')
+            # scheduled_aos is 'YYYY-MM-DDTHH:MM:SS'; slice instead of re-parsing
+            aos = item.scheduled_aos
+            day = aos[:10]
             if day != current_day:
-                print(f"\n  {day}")
-                print(f"  {'-' * 40}")
+                parts.append(f"\n  {day}")
+                parts.append(f"  {'-' * 40}")
                 current_day = day
             
-            time_str = aos_dt.strftime('%H:%M:%S')
+            time_str = aos[11:19]
             sat = p.get('satellite', 'Unknown')
             el = p.get('max_elevation', 0)
             prob = pred['success_probability']
@@ -235,15 +415,16 @@ class ScheduleOptimizer:
             
             rec_symbol = {'capture': '+', 'marginal': '~', 'skip': '-'}.get(rec, '?')
             
-            print(f"  [{rec_symbol}] {time_str} UTC | {sat:20} | "
-                  f"El: {el:4.1f}° | P(success): {prob:5.1%}")
+            parts.append(f"  [{rec_symbol}] {time_str} UTC | {sat:20} | "
+                         f"El: {el:4.1f}° | P(success): {prob:5.1%}")
         
-        print("\n" + "=" * 70)
+        parts.append("\n" + "=" * 70)
+        sys.stdout.write("\n".join(parts) + "\n")
 
 
 def generate_schedule(hours_ahead: int = 48,
                       weather: Optional[Dict] = None,
-                      constraints: Optional[Dict] = None) -> List[Dict]:
+                      constraints: Optional[Dict] = None) -> List[ScheduledPass]:
     """
     Convenience function to generate schedule.
     
@@ -260,7 +441,7 @@ def generate_schedule(hours_ahead: int = 48,
 
 
 def optimize_next_n(n: int = 5,
-                    weather: Optional[Dict] = None) -> List[Dict]:
+                    weather: Optional[Dict] = None) -> List[ScheduledPass]:
     """
     Get the next N best passes to capture.
     
@@ -296,12 +477,12 @@ if __name__ == "__main__":
         output = []
         for item in schedule:
             output.append({
-                'satellite': item['pass'].get('satellite'),
-                'aos': item['scheduled_aos'],
-                'los': item['scheduled_los'],
-                'max_elevation': item['pass'].get('max_elevation'),
-                'success_probability': item['prediction']['success_probability'],
-                'recommendation': item['prediction']['recommendation'],
+                'satellite': item.pass_.get('satellite'),
+                'aos': item.scheduled_aos,
+                'los': item.scheduled_los,
+                'max_elevation': item.pass_.get('max_elevation'),
+                'success_probability': item.prediction['success_probability'],
+                'recommendation': item.prediction['recommendation'],
             })
         print(json.dumps(output, indent=2))
     else:
@@ -311,5 +492,5 @@ if __name__ == "__main__":
         print(f"\nNext recommended capture:")
         if schedule:
             next_pass = schedule[0]
-            print(f"  {next_pass['pass'].get('satellite')} at {next_pass['scheduled_aos']}")
-            print(f"  Success probability: {next_pass['prediction']['success_probability']:.1%}")
+            print(f"  {next_pass.pass_.get('satellite')} at {next_pass.scheduled_aos}")
+            print(f"  Success probability: {next_pass.prediction['success_probability']:.1%}")
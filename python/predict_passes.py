@@ -1,5 +1,11 @@
 from skyfield.api import load, wgs84
 from datetime import datetime, timedelta
+import email.utils
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
 import numpy as np
 
 # Observer location: State College, PA
@@ -8,6 +14,103 @@ LONGITUDE = -77.8600  # degrees W
 ELEVATION = 376       # meters
 MIN_ELEVATION = 10    # degrees - only passes above 10° horizon
 
+# TLE source and local cache
+TLE_URL = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=weather&FORMAT=tle'
+TLE_FILE = 'weather.txt'
+TLE_MAX_AGE_SEC = 3 * 3600   # Revalidate with Celestrak when the local file is older than this
+
+# Process-wide caches (filled lazily on first use)
+_TS = None
+_TLE_CACHE = {}   # (url, filename) -> (mtime, satellites)
+
+
+def get_timescale():
+    """Return a shared Skyfield timescale, created on first use."""
+    global _TS
+    if _TS is None:
+        _TS = load.timescale()
+    return _TS
+
+
+def _refresh_tle_file(url, filename):
+    """
+    Conditionally re-download a TLE file.
+    
+    Sends If-Modified-Since from the local file's mtime. On 304 the file is
+    only touched so its age restarts.
+    
+    Returns True if new data was written, False if unchanged.
+    """
+    request = urllib.request.Request(url)
+    if os.path.exists(filename):
+        request.add_header('If-Modified-Since',
+                           email.utils.formatdate(os.path.getmtime(filename), usegmt=True))
+    
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            data = response.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and os.path.exists(filename):
+            os.utime(filename, None)
+            return False
+        raise
+    
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, filename)
+    return True
+
+
+def load_satellites(url=TLE_URL, filename=TLE_FILE, max_age_sec=TLE_MAX_AGE_SEC):
+    """
+    Load TLEs, shared by everything in the process that needs the weather group.
+    
+    The local file is revalidated against Celestrak only once it is older
+    than max_age_sec, and parsed satellites are kept in memory until the
+    file content changes. If the refresh fails, a stale local file is used.
+    """
+    key = (url, filename)
+    
+    if not os.path.exists(filename) or time.time() - os.path.getmtime(filename) > max_age_sec:
+        try:
+            changed = _refresh_tle_file(url, filename)
+        except (urllib.error.URLError, OSError) as e:
+            if not os.path.exists(filename):
+                raise
+            print(f"Warning: TLE refresh failed ({e}), using cached {filename}")
+            changed = False
+        
+        # 304 / failed refresh: keep the parsed list, just follow the new mtime
+        if not changed and key in _TLE_CACHE:
+            _TLE_CACHE[key] = (os.path.getmtime(filename), _TLE_CACHE[key][1])
+    
+    mtime = os.path.getmtime(filename)
+    cached = _TLE_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    satellites = load.tle_file(filename)
+    _TLE_CACHE[key] = (mtime, satellites)
+    return satellites
+
+# One row per pass; times are naive UTC, unset fields are NaT / NaN
+PASS_DTYPE = np.dtype([
+    ('aos_time', 'datetime64[s]'),
+    ('aos_az', 'f4'),
+    ('max_el', 'f4'),
+    ('max_time', 'datetime64[s]'),
+    ('max_az', 'f4'),
+    ('los_time', 'datetime64[s]'),
+    ('los_az', 'f4'),
+])
+NAT = np.datetime64('NaT', 's')
+
+
+def _format_utc(times):
+    """Format a datetime64[s] array as 'YYYY-MM-DD HH:MM:SS' strings."""
+    return np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ')
+
 def main():
     print("="*60)
     print("SATELLITE GROUND STATION - PASS PREDICTOR V0")
@@ -17,15 +120,14 @@ def main():
     print(f"Minimum elevation: {MIN_ELEVATION}°\n")
     
     # Load timescale and ephemeris
-    ts = load.timescale()
+    ts = get_timescale()
     
     # Observer position
     observer = wgs84.latlon(LATITUDE, LONGITUDE, elevation_m=ELEVATION)
     
     # Download latest TLE data for NOAA weather satellites
-    print("Downloading TLE data from Celestrak...")
-    stations_url = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=weather&FORMAT=tle'
-    satellites = load.tle_file(stations_url, filename='weather.txt')
+    print("Loading TLE data from Celestrak...")
+    satellites = load_satellites()
     print(f"Loaded {len(satellites)} satellites\n")
     
     # Find NOAA 20
@@ -50,60 +152,59 @@ def main():
     # Find events (rise, culminate, set)
     t, events = noaa18.find_events(observer, t0, t1, altitude_degrees=MIN_ELEVATION)
     
+    # Evaluate alt/az for all event times in one vectorized call
+    passes = np.empty(len(events), dtype=PASS_DTYPE)
+    n_passes = 0
+    if len(events):
+        difference = noaa18 - observer
+        alts, azs, _ = difference.at(t).altaz()
+        alt_deg = alts.degrees
+        az_deg = azs.degrees
+        utc_times = np.array([d.replace(tzinfo=None) for d in t.utc_datetime()],
+                             dtype='datetime64[s]')
+    
     # Group events into passes
-    passes = []
-    for ti, event in zip(t, events):
+    for i, event in enumerate(events):
         if event == 0:  # Rise (AOS)
-            aos_time = ti.utc_datetime()
-            difference = noaa18 - observer
-            topocentric = difference.at(ti)
-            alt, az, distance = topocentric.altaz()
-            aos_az = az.degrees
-            
-            passes.append({
-                'aos_time': aos_time,
-                'aos_az': aos_az,
-                'max_el': None,
-                'max_time': None,
-                'max_az': None,
-                'los_time': None,
-                'los_az': None
-            })
+            passes[n_passes] = (utc_times[i], az_deg[i], np.nan, NAT, np.nan, NAT, np.nan)
+            n_passes += 1
         
-        elif event == 1 and passes:  # Culminate (max elevation)
-            difference = noaa18 - observer
-            topocentric = difference.at(ti)
-            alt, az, distance = topocentric.altaz()
-            
-            passes[-1]['max_el'] = alt.degrees
-            passes[-1]['max_time'] = ti.utc_datetime()
-            passes[-1]['max_az'] = az.degrees
+        elif event == 1 and n_passes:  # Culminate (max elevation)
+            p = passes[n_passes - 1]
+            p['max_el'] = alt_deg[i]
+            p['max_time'] = utc_times[i]
+            p['max_az'] = az_deg[i]
         
-        elif event == 2 and passes:  # Set (LOS)
-            difference = noaa18 - observer
-            topocentric = difference.at(ti)
-            alt, az, distance = topocentric.altaz()
-            
-            passes[-1]['los_time'] = ti.utc_datetime()
-            passes[-1]['los_az'] = az.degrees
+        elif event == 2 and n_passes:  # Set (LOS)
+            p = passes[n_passes - 1]
+            p['los_time'] = utc_times[i]
+            p['los_az'] = az_deg[i]
     
     # Filter complete passes and display
-    complete_passes = [p for p in passes if p['los_time'] is not None]
+    passes = passes[:n_passes]
+    complete_passes = passes[~np.isnat(passes['los_time'])]
     
     print(f"Found {len(complete_passes)} passes above {MIN_ELEVATION}° elevation:\n")
     
-    for i, p in enumerate(complete_passes, 1):
-        duration = (p['los_time'] - p['aos_time']).seconds // 60
-        
-        print(f"Pass {i}:")
-        print(f"  AOS: {p['aos_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC (Az: {p['aos_az']:.1f}°)")
-        print(f"  MAX: {p['max_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC (El: {p['max_el']:.1f}°, Az: {p['max_az']:.1f}°)")
-        print(f"  LOS: {p['los_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC (Az: {p['los_az']:.1f}°)")
-        print(f"  Duration: {duration} minutes\n")
+    # Format all times at once, then build the listing and write it in one call
+    aos_str = _format_utc(complete_passes['aos_time'])
+    max_str = _format_utc(complete_passes['max_time'])
+    los_str = _format_utc(complete_passes['los_time'])
+    durations = (complete_passes['los_time'] - complete_passes['aos_time']).astype(np.int64) // 60
+    
+    parts = []
+    for i, p in enumerate(complete_passes):
+        parts.append(f"Pass {i + 1}:")
+        parts.append(f"  AOS: {aos_str[i]} UTC (Az: {p['aos_az']:.1f}°)")
+        parts.append(f"  MAX: {max_str[i]} UTC (El: {p['max_el']:.1f}°, Az: {p['max_az']:.1f}°)")
+        parts.append(f"  LOS: {los_str[i]} UTC (Az: {p['los_az']:.1f}°)")
+        parts.append(f"  Duration: {durations[i]} minutes\n")
+    if parts:
+        sys.stdout.write("\n".join(parts) + "\n")
     
-    if complete_passes:
+    if len(complete_passes):
         print("="*60)
-        print(f"NEXT PASS: {complete_passes[0]['aos_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        print(f"NEXT PASS: {aos_str[0]} UTC")
         print(f"Max elevation: {complete_passes[0]['max_el']:.1f}°")
         print("="*60)
 
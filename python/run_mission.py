@@ -31,11 +31,18 @@ from python.schedule_captures import (
     wait_for_pass,
     execute_capture,
     ensure_directories,
+    PassView,
     CONFIG
 )
 from python.doppler_calc import calculate_doppler_profile, save_doppler_profile
 from python.data_store import log_mission, log_training_sample, log_metrics, print_summary
 
+try:
+    from python.demod.decode_apt import decode_apt as _decode_apt
+except ImportError as e:
+    _decode_apt = None
+    _decode_import_error = e
+
 
 def decode_capture_file(capture_file, output_dir):
     """Decode captured I/Q file to image."""
@@ -43,9 +50,12 @@ def decode_capture_file(capture_file, output_dir):
         print(f"Capture file not found: {capture_file}")
         return None
     
+    if _decode_apt is None:
+        print(f"Decode error: APT decoder unavailable ({_decode_import_error})")
+        return None
+    
     try:
-        from python.demod.decode_apt import decode_apt
-        result = decode_apt(capture_file, output_dir)
+        result = _decode_apt(capture_file, output_dir)
         return result
     except Exception as e:
         print(f"Decode error: {e}")
@@ -108,23 +118,24 @@ def run_mission(
     
     # Filter by satellite if specified
     if satellite:
-        passes = [p for p in passes if satellite.upper() in p['satellite'].upper()]
+        passes = passes.for_satellite(satellite)
         if not passes:
             print(f"No passes found for satellite: {satellite}")
             return None
     
     # Select best pass
     selected_pass = select_best_pass(passes)
+    view = PassView.from_pass(selected_pass)
     
     print("Step 2: Selected pass:")
     print(f"  Satellite: {selected_pass['satellite']}")
-    print(f"  AOS: {selected_pass['aos_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
-    print(f"  LOS: {selected_pass['los_time'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    print(f"  AOS: {view.aos_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    print(f"  LOS: {view.los_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print(f"  Max Elevation: {selected_pass['max_elevation']:.1f}°")
-    print(f"  Duration: {selected_pass['duration_sec']/60:.1f} minutes")
+    print(f"  Duration: {view.duration_min:.1f} minutes")
     
     # Time until pass
-    time_until = (selected_pass['aos_time'].replace(tzinfo=None) - datetime.utcnow().replace(tzinfo=None)).total_seconds()
+    time_until = (view.aos_time - datetime.utcnow()).total_seconds()
     if time_until > 0:
         print(f"  Time until AOS: {time_until/60:.1f} minutes")
     else:
@@ -225,14 +236,13 @@ def run_mission(
     print("Step 8: Logging ML training sample...")
     
     weather = get_weather_data()
-    aos_hour = selected_pass['aos_time'].hour + selected_pass['aos_time'].minute / 60.0
     
     log_training_sample(
         satellite=selected_pass['satellite'],
         max_elevation_deg=selected_pass['max_elevation'],
-        duration_min=selected_pass['duration_sec'] / 60.0,
-        time_of_day_hour=aos_hour,
-        day_of_week=selected_pass['aos_time'].weekday(),
+        duration_min=view.duration_min,
+        time_of_day_hour=view.aos_hour,
+        day_of_week=view.aos_weekday,
         cloud_cover_pct=weather.get('cloud_cover_pct'),
         precipitation_prob=weather.get('precipitation_prob'),
         temperature_c=weather.get('temperature_c'),
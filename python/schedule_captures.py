@@ -19,19 +19,28 @@ Author: Luke Waszyn
 Date: February 2026
 """
 
+import multiprocessing
 import os
+import re
 import sys
-import json
 import time
 import subprocess
-from datetime import datetime, timedelta
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import cached_property, partial
 from pathlib import Path
 
+import numpy as np
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from python.predict_passes import main as predict_passes
+from python.predict_passes import main as predict_passes, get_timescale, load_satellites
 from python.doppler_calc import calculate_doppler_profile, save_doppler_profile
+from python.data_store import get_mission_db
 
 # Configuration
 CONFIG = {
@@ -40,6 +49,9 @@ CONFIG = {
     'post_los_margin_sec': 30,      # Continue capture this many seconds after LOS
     'capture_sample_rate': 2.4e6,   # RTL-SDR sample rate
     'capture_gain_db': 40,          # SDR gain
+    'usb_buf_len': 32768,           # C++ capture: USB transfer size (bytes)
+    'usb_buf_count': 120,           # C++ capture: USB transfers in flight
+    'capture_cpu': None,            # Pin the capture process to this CPU (e.g. one reserved with isolcpus=)
     'data_dir': 'data',
     'captures_dir': 'data/captures',
     'decoded_dir': 'data/decoded',
@@ -47,6 +59,29 @@ CONFIG = {
     'doppler_dir': 'data/doppler',
 }
 
+# APT-capable NOAA satellites by number
+NOAA_NUMBERS = ('15', '18', '19', '20')
+_NOAA_RE = re.compile(r'NOAA (?:%s)\b' % '|'.join(NOAA_NUMBERS))
+
+# Observer location (State College, PA)
+LATITUDE = 40.7934
+LONGITUDE = -77.8600
+ELEVATION = 376
+
+# (satellite list from load_satellites, NOAA subset); the list object only
+# changes when the TLE file is reparsed
+_NOAA_SATS_CACHE = (None, [])
+
+# wait_for_pass prints progress only at these times before capture start
+WAIT_MILESTONES_SEC = (600, 300, 60)
+
+_OBSERVER = None
+_OBSERVER_DIFFS = {}    # satellite -> satellite - observer, cleared on reparse
+
+# APT decoding runs here so the scheduler can move on to the next pass;
+# created on first use by _get_decode_pool()
+_decode_pool = None
+
 
 def ensure_directories():
     """Create necessary data directories."""
@@ -54,42 +89,99 @@ def ensure_directories():
         Path(CONFIG[key]).mkdir(parents=True, exist_ok=True)
 
 
+class PassList(list):
+    """
+    List of pass dictionaries with a per-satellite index.
+    
+    The index is built on first use and not updated if the list is mutated
+    afterwards.
+    """
+    
+    @cached_property
+    def by_satellite(self):
+        """Passes grouped by upper-cased satellite name, in AOS order."""
+        index = {}
+        for p in self:
+            index.setdefault(p['satellite'].upper(), []).append(p)
+        return index
+    
+    def for_satellite(self, name):
+        """
+        Passes for a satellite: exact name match, otherwise every satellite
+        whose name contains `name` (e.g. 'NOAA 20' -> 'NOAA 20 (JPSS-1)').
+        """
+        key = name.upper()
+        if key in self.by_satellite:
+            return self.by_satellite[key]
+        matches = [p for sat, sat_passes in self.by_satellite.items() if key in sat
+                   for p in sat_passes]
+        matches.sort(key=lambda p: p['aos_time'])
+        return matches
+
+
+@dataclass(frozen=True)
+class PassView:
+    """
+    Time fields of a pass, derived once for display and logging.
+    
+    Times are naive UTC.
+    """
+    pass_info: dict
+    aos_time: datetime
+    los_time: datetime
+    aos_hour: float         # Fractional hour of day
+    aos_weekday: int        # Monday == 0
+    duration_min: float
+    
+    @classmethod
+    def from_pass(cls, pass_info):
+        aos = pass_info['aos_time'].replace(tzinfo=None)
+        los = pass_info['los_time'].replace(tzinfo=None)
+        return cls(
+            pass_info=pass_info,
+            aos_time=aos,
+            los_time=los,
+            aos_hour=aos.hour + aos.minute / 60.0,
+            aos_weekday=aos.weekday(),
+            duration_min=pass_info['duration_sec'] / 60.0,
+        )
+
+
+def get_noaa_satellites():
+    """NOAA APT satellites from the current TLE set (refiltered only on reparse)."""
+    global _NOAA_SATS_CACHE
+    satellites = load_satellites()
+    cached_sats, noaa_sats = _NOAA_SATS_CACHE
+    if cached_sats is not satellites:
+        noaa_sats = [sat for sat in satellites if _NOAA_RE.search(sat.name)]
+        _NOAA_SATS_CACHE = (satellites, noaa_sats)
+        _OBSERVER_DIFFS.clear()
+    return noaa_sats
+
+
+def get_observer():
+    """Ground station position, built once."""
+    global _OBSERVER
+    if _OBSERVER is None:
+        from skyfield.api import wgs84
+        _OBSERVER = wgs84.latlon(LATITUDE, LONGITUDE, elevation_m=ELEVATION)
+    return _OBSERVER
+
+
 def get_upcoming_passes(hours_ahead=24, min_elevation=None):
     """
     Get upcoming satellite passes.
     
-    Returns list of pass dictionaries with AOS, LOS, max elevation, etc.
+    Returns a PassList of pass dictionaries with AOS, LOS, max elevation, etc.
     """
-    from skyfield.api import load, wgs84
-    
     if min_elevation is None:
         min_elevation = CONFIG['min_elevation_deg']
     
-    # Observer location (State College, PA)
-    LATITUDE = 40.7934
-    LONGITUDE = -77.8600
-    ELEVATION = 376
-    
-    ts = load.timescale()
-    observer = wgs84.latlon(LATITUDE, LONGITUDE, elevation_m=ELEVATION)
+    ts = get_timescale()
+    observer = get_observer()
     
-    # Load satellites
-    tle_file = 'weather.txt'
-    url = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=weather&FORMAT=tle'
-    
-    if not os.path.exists(tle_file):
-        satellites = load.tle_file(url, filename=tle_file)
-    else:
-        # Check if TLE is stale (>24 hours old)
-        tle_age = time.time() - os.path.getmtime(tle_file)
-        if tle_age > 86400:
-            print("TLE file is stale, refreshing...")
-            satellites = load.tle_file(url, filename=tle_file, reload=True)
-        else:
-            satellites = load.tle_file(tle_file)
-    
-    # Filter to NOAA satellites
-    noaa_sats = [sat for sat in satellites if 'NOAA' in sat.name and any(n in sat.name for n in ['15', '18', '19', '20'])]
+    # Load satellites (shared, revalidated TLE cache)
+    noaa_sats = get_noaa_satellites()
     
     passes = []
     t0 = ts.now()
@@ -98,49 +190,56 @@ def get_upcoming_passes(hours_ahead=24, min_elevation=None):
     for satellite in noaa_sats:
         try:
             t, events = satellite.find_events(observer, t0, t1, altitude_degrees=10)
+            if not len(events):
+                continue
+            
+            # Alt/az and UTC times for every event in one vectorized call
+            diff = _OBSERVER_DIFFS.get(satellite)
+            if diff is None:
+                diff = _OBSERVER_DIFFS[satellite] = satellite - observer
+            alt, az, _ = diff.at(t).altaz()
+            alt_deg = alt.degrees
+            az_deg = az.degrees
+            utc_times = t.utc_datetime()
             
-            current_pass = {}
-            for ti, event in zip(t, events):
-                if event == 0:  # AOS
-                    current_pass = {
-                        'satellite': satellite.name,
-                        'aos_time': ti.utc_datetime(),
-                    }
-                    diff = satellite - observer
-                    topo = diff.at(ti)
-                    alt, az, _ = topo.altaz()
-                    current_pass['aos_az'] = az.degrees
-                    
-                elif event == 1:  # Max elevation
-                    if current_pass:
-                        current_pass['max_time'] = ti.utc_datetime()
-                        diff = satellite - observer
-                        topo = diff.at(ti)
-                        alt, az, _ = topo.altaz()
-                        current_pass['max_elevation'] = alt.degrees
-                        current_pass['max_az'] = az.degrees
-                        
-                elif event == 2:  # LOS
-                    if current_pass and 'max_elevation' in current_pass:
-                        current_pass['los_time'] = ti.utc_datetime()
-                        diff = satellite - observer
-                        topo = diff.at(ti)
-                        alt, az, _ = topo.altaz()
-                        current_pass['los_az'] = az.degrees
-                        current_pass['duration_sec'] = (current_pass['los_time'] - current_pass['aos_time']).total_seconds()
-                        
-                        # Filter by elevation
-                        if current_pass['max_elevation'] >= min_elevation:
-                            passes.append(current_pass)
-                        
-                        current_pass = {}
+            # Pair each AOS with the next LOS and the culmination just before
+            # it. A pass is complete only if that LOS comes before the next
+            # AOS and a culmination lies between them.
+            events = np.asarray(events)
+            aos_idx = np.flatnonzero(events == 0)
+            los_all = np.flatnonzero(events == 2)
+            next_aos = np.append(aos_idx[1:], len(events))
+            k = np.searchsorted(los_all, aos_idx)
+            has_los = k < len(los_all)
+            aos_idx, next_aos = aos_idx[has_los], next_aos[has_los]
+            los_idx = los_all[k[has_los]]
+            max_idx = los_idx - 1
+            keep = ((los_idx < next_aos) & (max_idx > aos_idx) & (events[max_idx] == 1)
+                    & (alt_deg[max_idx] >= min_elevation))
+            
+            passes.extend(
+                {
+                    'satellite': satellite.name,
+                    'aos_time': utc_times[a],
+                    'aos_epoch': int(utc_times[a].timestamp()),
+                    'aos_az': az_deg[a],
+                    'max_time': utc_times[m],
+                    'max_elevation': alt_deg[m],
+                    'max_az': az_deg[m],
+                    'los_time': utc_times[l],
+                    'los_epoch': int(utc_times[l].timestamp()),
+                    'los_az': az_deg[l],
+                    'duration_sec': (utc_times[l] - utc_times[a]).total_seconds(),
+                }
+                for a, m, l in zip(aos_idx[keep], max_idx[keep], los_idx[keep])
+            )
         except Exception as e:
             print(f"Warning: Error processing {satellite.name}: {e}")
     
     # Sort by AOS time
     passes.sort(key=lambda p: p['aos_time'])
     
-    return passes
+    return PassList(passes)
 
 
 def select_best_pass(passes):
@@ -149,27 +248,27 @@ def select_best_pass(passes):
         return None
     
     # Score passes: higher elevation = better, sooner = slightly better
-    now = datetime.utcnow().replace(tzinfo=None)
-    
-    def score_pass(p):
-        # Elevation is primary factor (0-90 degrees)
-        el_score = p['max_elevation']
-        
-        # Time factor: slight preference for sooner passes
-        hours_until = (p['aos_time'].replace(tzinfo=None) - now).total_seconds() / 3600
-        time_score = max(0, 10 - hours_until)  # Up to 10 bonus points for passes within 10 hours
-        
-        return el_score + time_score
-    
-    return max(passes, key=score_pass)
+    # (up to 10 bonus points for passes within 10 hours). AOS times are UTC.
+    now_ts = datetime.now(timezone.utc).timestamp()
+    el_score = np.fromiter((p['max_elevation'] for p in passes),
+                           dtype=np.float64, count=len(passes))
+    hours_until = np.fromiter(
+        ((p['aos_time'].replace(tzinfo=timezone.utc).timestamp() - now_ts) / 3600
+         for p in passes),
+        dtype=np.float64, count=len(passes))
+    scores = el_score + np.maximum(0, 10 - hours_until)
+    
+    return passes[int(scores.argmax())]
 
 
 def wait_for_pass(pass_info):
     """Wait until it's time to start capture."""
     aos = pass_info['aos_time']
+    if aos.tzinfo is None:
+        aos = aos.replace(tzinfo=timezone.utc)
     start_time = aos - timedelta(seconds=CONFIG['pre_aos_margin_sec'])
     
-    now = datetime.utcnow().replace(tzinfo=None)
+    now = datetime.now(timezone.utc)
     wait_seconds = (start_time - now).total_seconds()
     
     if wait_seconds <= 0:
@@ -181,29 +280,41 @@ def wait_for_pass(pass_info):
     print(f"  Capture starts: {start_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print(f"  Current time: {now.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     
-    # Wait with periodic updates
-    while wait_seconds > 0:
-        if wait_seconds > 60:
-            print(f"  {wait_seconds/60:.1f} minutes remaining...")
-            time.sleep(60)
-        elif wait_seconds > 10:
-            print(f"  {wait_seconds:.0f} seconds remaining...")
-            time.sleep(10)
-        else:
-            time.sleep(1)
-        
-        now = datetime.utcnow().replace(tzinfo=None)
-        wait_seconds = (start_time - now).total_seconds()
+    # Sleep straight through to each progress milestone on the monotonic clock
+    deadline = time.monotonic() + wait_seconds
+    for milestone in WAIT_MILESTONES_SEC:
+        remaining = deadline - time.monotonic()
+        if remaining > milestone:
+            time.sleep(remaining - milestone)
+            print(f"  {milestone / 60:.0f} minutes remaining...")
+    
+    # Land just short of the deadline, then absorb any wall-clock skew
+    time.sleep(max(0.0, deadline - time.monotonic() - 1))
+    time.sleep(max(0.0, (start_time - datetime.now(timezone.utc)).total_seconds()))
     
     return True
 
 
-def execute_capture(pass_info, doppler_profile):
+def pin_capture_process(pid):
+    """Restrict a capture process to CONFIG['capture_cpu'], if set (Linux only)."""
+    cpu = CONFIG['capture_cpu']
+    if cpu is None or not hasattr(os, 'sched_setaffinity'):
+        return
+    try:
+        os.sched_setaffinity(pid, {cpu})
+    except OSError as e:
+        print(f"Warning: could not pin capture to CPU {cpu}: {e}")
+
+
+def execute_capture(pass_info, doppler_profile, capture_config=None):
     """
     Execute the capture for a satellite pass.
     
     This calls the C++ capture program or falls back to rtl_sdr command.
+    USB buffer tunables in capture_config (e.g. the server's 'capture'
+    config section) override CONFIG.
     """
+    capture_config = capture_config or {}
     sat_name = pass_info['satellite'].replace(' ', '_').replace('(', '').replace(')', '')
     timestamp = pass_info['aos_time'].strftime('%Y%m%d_%H%M%S')
     
@@ -232,6 +343,8 @@ def execute_capture(pass_info, doppler_profile):
     cpp_capture = './cpp/build/rtlsdr_capture'
     
     if os.path.exists(cpp_capture):
+        # Sample ring between USB callback and file writer: 2 s of 8-bit I/Q, at least 32 MB
+        ring_mb = max(32, int(CONFIG['capture_sample_rate'] * 2 * 2 / 1e6))
         cmd = [
             cpp_capture,
             '-f', str(int(center_freq)),
@@ -239,6 +352,9 @@ def execute_capture(pass_info, doppler_profile):
             '-g', str(int(CONFIG['capture_gain_db'])),
             '-d', str(int(duration_sec)),
             '-o', output_file,
+            '--ring-mb', str(ring_mb),
+            '--usb-buf-len', str(int(capture_config.get('usb_buf_len', CONFIG['usb_buf_len']))),
+            '--usb-buf-count', str(int(capture_config.get('usb_buf_count', CONFIG['usb_buf_count']))),
         ]
     else:
         # Fall back to rtl_sdr command
@@ -255,19 +371,28 @@ def execute_capture(pass_info, doppler_profile):
     print(f"Executing: {' '.join(cmd)}")
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=duration_sec + 60)
-        
-        if result.returncode == 0:
-            print("\nCapture completed successfully!")
-            return output_file
-        else:
-            print(f"\nCapture failed with return code {result.returncode}")
-            print(f"stderr: {result.stderr}")
+        # stdout is discarded and stderr goes to an unbuffered temp file, so no
+        # pipe-draining thread competes with the capture; stderr is only read on failure
+        with tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=err)
+            pin_capture_process(proc.pid)
+            try:
+                returncode = proc.wait(timeout=duration_sec + 60)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                print("\nCapture timed out!")
+                return None
+            
+            if returncode == 0:
+                print("\nCapture completed successfully!")
+                return output_file
+            
+            err.seek(0)
+            print(f"\nCapture failed with return code {returncode}")
+            print(f"stderr: {err.read().decode(errors='replace')}")
             return None
             
-    except subprocess.TimeoutExpired:
-        print("\nCapture timed out!")
-        return None
     except FileNotFoundError:
         print(f"\nCapture program not found. Install rtl_sdr or build C++ capture.")
         return None
@@ -304,9 +429,10 @@ def decode_capture(capture_file, pass_info):
         return None
 
 
-def log_mission(pass_info, capture_file, decode_result):
+def log_mission(pass_info, capture_file, decode_result, decode_pending=False):
     """Log mission results to data store."""
     mission_log = {
+        'id': uuid.uuid4().hex,
         'timestamp': datetime.utcnow().isoformat(),
         'satellite': pass_info['satellite'],
         'aos_utc': pass_info['aos_time'].isoformat(),
@@ -316,28 +442,57 @@ def log_mission(pass_info, capture_file, decode_result):
         'capture_file': capture_file,
         'capture_success': capture_file is not None and os.path.exists(capture_file) if capture_file else False,
         'decode_success': decode_result is not None,
+        'decode_pending': decode_pending,
         'image_file': decode_result['png_path'] if decode_result else None,
     }
     
-    # Append to mission log
-    log_file = os.path.join(CONFIG['data_dir'], 'mission_log.json')
-    
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            logs = json.load(f)
-    else:
-        logs = []
-    
-    logs.append(mission_log)
+    db = get_mission_db(CONFIG['data_dir'])
+    db.insert(mission_log)
     
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=2)
-    
-    print(f"\nMission logged: {log_file}")
+    print(f"\nMission logged: {db.path}")
     
     return mission_log
 
 
+def log_decode_complete(mission_id, decode_result):
+    """Record the outcome of a background decode on its mission."""
+    return get_mission_db(CONFIG['data_dir']).update(mission_id, {
+        'decode_completed': datetime.utcnow().isoformat(),
+        'decode_success': decode_result is not None,
+        'decode_pending': False,
+        'image_file': decode_result['png_path'] if decode_result else None,
+    })
+
+
+def _on_decode_done(mission_id, future):
+    """Decode-pool callback: log the result of a background decode."""
+    try:
+        decode_result = future.result()
+    except Exception as e:
+        print(f"Decode failed: {e}")
+        decode_result = None
+    log_decode_complete(mission_id, decode_result)
+    print(f"Decode finished for mission {mission_id}")
+
+
+def _get_decode_pool():
+    """Return the background decode pool, starting it on first use."""
+    global _decode_pool
+    if _decode_pool is None:
+        # spawn rather than fork: importers (e.g. the HMI server) have live threads
+        _decode_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    return _decode_pool
+
+
+def wait_for_decodes():
+    """Block until background decodes have finished (no-op if none were started)."""
+    global _decode_pool
+    if _decode_pool is not None:
+        _decode_pool.shutdown(wait=True)
+        _decode_pool = None
+
+
 def run_single_capture(pass_info=None):
     """Run a single capture mission."""
     ensure_directories()
@@ -376,11 +531,15 @@ def run_single_capture(pass_info=None):
     # Execute capture
     capture_file = execute_capture(pass_info, doppler_profile)
     
-    # Decode
-    decode_result = decode_capture(capture_file, pass_info)
-    
-    # Log mission
-    mission_log = log_mission(pass_info, capture_file, decode_result)
+    # Log the capture now and decode in the background; the mission record
+    # is updated when decoding finishes
+    if capture_file and os.path.exists(capture_file):
+        mission_log = log_mission(pass_info, capture_file, None, decode_pending=True)
+        future = _get_decode_pool().submit(decode_capture, capture_file, pass_info)
+        future.add_done_callback(partial(_on_decode_done, mission_log['id']))
+    else:
+        print("No capture file to decode")
+        mission_log = log_mission(pass_info, capture_file, None)
     
     return mission_log
 
@@ -421,6 +580,7 @@ def run_daemon(hours=24):
         # Brief pause before looking for next pass
         time.sleep(60)
     
+    wait_for_decodes()
     print("\nDaemon finished.")
 
 
@@ -460,5 +620,6 @@ if __name__ == "__main__":
         list_upcoming_passes()
     elif args.command == 'capture':
         run_single_capture()
+        wait_for_decodes()
     elif args.command == 'daemon':
         run_daemon(args.hours)
@@ -21,7 +21,7 @@ API Endpoints:
   GET  /api/orbital-data     → Live orbital data (replaces orbital_data.json)
   GET  /api/passes           → Upcoming passes with capture recommendations
   GET  /api/status           → System status (SDR, capture state, etc.)
-  GET  /api/missions         → Mission history log
+  GET  /api/missions         → Mission history log (?limit=N for the latest N)
   GET  /api/config           → Current station configuration
   PUT  /api/config           → Update station configuration
   POST /api/capture          → Schedule/trigger a satellite capture
@@ -31,16 +31,27 @@ Author: Luke Waszyn
 Date: February 2026
 """
 
+import gzip
+import copy
+import email.utils
+import hashlib
 import json
 import os
 import sys
 import time
 import threading
 import mimetypes
+import multiprocessing
 import subprocess
 import traceback
+from bisect import bisect_left
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 from datetime import datetime, timezone
 
@@ -52,17 +63,25 @@ HMI_DIR = BASE_DIR / 'hmi'
 DATA_DIR = BASE_DIR / 'data'
 DECODED_DIR = DATA_DIR / 'decoded'
 CAPTURES_DIR = DATA_DIR / 'captures'
+TLE_DIR = BASE_DIR                  # where the orbital generator caches tle_*.txt
 CONFIG_PATH = BASE_DIR / 'config.json'
-MISSION_LOG_PATH = DATA_DIR / 'mission_log.json'
 
 # Add project root to path for imports
 sys.path.insert(0, str(BASE_DIR))
 
+from python.data_store import get_mission_db, json_dumps, json_loads
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 
 # =============================================================
 # Default Configuration
 # =============================================================
-DEFAULT_CONFIG = {
+# Read-only; get_config() hands out a merged copy, never this mapping.
+DEFAULT_CONFIG = MappingProxyType({
     'station': {
         'name': 'My Ground Station',
         'lat': 40.7934,
@@ -76,6 +95,8 @@ DEFAULT_CONFIG = {
         'pre_aos_margin_sec': 30,
         'post_los_margin_sec': 30,
         'primary_freq_hz': 137.1e6,
+        'usb_buf_len': 32768,       # C++ capture USB transfer size (bytes)
+        'usb_buf_count': 120,       # C++ capture USB transfers in flight
     },
     'hmi': {
         'propagation_hours': 24,
@@ -83,45 +104,111 @@ DEFAULT_CONFIG = {
         'doppler_step_sec': 5,
         'http_port': 8080,
     },
-}
+})
 
 
-def load_config():
-    """Load config from file, falling back to defaults."""
-    config = DEFAULT_CONFIG.copy()
-    if CONFIG_PATH.exists():
-        try:
-            with open(CONFIG_PATH, 'r') as f:
-                user_config = json.load(f)
-            # Deep merge user config over defaults
-            for section in user_config:
-                if section in config and isinstance(config[section], dict):
-                    config[section].update(user_config[section])
-                else:
-                    config[section] = user_config[section]
-        except Exception as e:
-            print(f"[WARN] Could not load config.json: {e}, using defaults")
-    return config
+CONFIG_STAT_INTERVAL_SEC = 1.0  # how often get_config() checks config.json for edits
+
+_config_cache = (None, None, 0.0)   # ((mtime_ns, size) of config.json, merged config, monotonic check time)
+_config_lock = threading.Lock()
+
+
+def _merge_config(base, overrides):
+    """Recursively merge overrides into base (in place) and return base."""
+    for key, value in overrides.items():
+        if isinstance(base.get(key), dict) and isinstance(value, dict):
+            _merge_config(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+    return base
+
+
+def _default_config():
+    """Fresh, mutable copy of DEFAULT_CONFIG."""
+    return copy.deepcopy(dict(DEFAULT_CONFIG))
+
+
+def _config_file_key():
+    """(mtime_ns, size) of config.json, or None if it does not exist."""
+    try:
+        st = CONFIG_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def get_config():
+    """
+    Return the current configuration (defaults merged with config.json).
+    
+    The merged dict is cached until config.json changes on disk, which is
+    checked at most every CONFIG_STAT_INTERVAL_SEC, so repeat calls usually
+    do no file I/O at all. Callers must treat it as read-only; take a
+    copy.deepcopy() before modifying it.
+    """
+    global _config_cache
+    with _config_lock:
+        cached_key, config, checked = _config_cache
+        now = time.monotonic()
+        if config is not None and now - checked < CONFIG_STAT_INTERVAL_SEC:
+            return config
+        
+        file_key = _config_file_key()
+        if config is not None and cached_key == file_key:
+            _config_cache = (cached_key, config, now)
+            return config
+        
+        config = _default_config()
+        if file_key is not None:
+            try:
+                with open(CONFIG_PATH, 'rb') as f:
+                    _merge_config(config, json_loads(f.read()))
+            except Exception as e:
+                print(f"[WARN] Could not load config.json: {e}, using defaults")
+        _config_cache = (file_key, config, now)
+        return config
 
 
 def save_config(config):
-    """Save config to file."""
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config, f, indent=2)
+    """Save config to file (atomically) and make it the cached config."""
+    global _config_cache
+    with _config_lock:
+        tmp_path = CONFIG_PATH.with_name(CONFIG_PATH.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(json_dumps(config, indent=True))
+        os.replace(tmp_path, CONFIG_PATH)
+        _config_cache = (_config_file_key(), config, time.monotonic())
 
 
 # =============================================================
 # System State (thread-safe)
 # =============================================================
+STATUS_CACHE_TTL_SEC = 0.5
+SDR_POLL_INTERVAL_SEC = 15    # /api/status asks for a fresh SDR check after this
+SDR_POLL_IDLE_SEC = 60        # background check interval when nobody is polling
+
+
 class SystemState:
     """Tracks current system state across threads."""
     def __init__(self):
         self._lock = threading.Lock()
         self.sdr_connected = False
+        self._sdr_check_ts = 0.0          # time.monotonic() of the last rtl_test run
+        self.sdr_poll_event = threading.Event()   # set to wake the SDR poller
         self.capturing = False
         self.current_capture = None       # Pass info if capturing
         self.last_orbital_update = None
         self.cached_orbital_data = None
+        self.orbital_cache_key = None     # (config hash, TLE mtime) of cached data
+        self.orbital_cache_time = 0.0     # time.monotonic() at generation
+        self.orbital_etag = None
+        self.orbital_payload = None       # Compact JSON bytes of cached_orbital_data
+        self.orbital_payload_gz = None    # Same, gzip-compressed
+        self.orbital_payload_msgpack = None   # MessagePack form (None without msgpack)
+        self.passes_index = {}            # role (None = all) -> (AOS list, passes by AOS)
+        self.max_pass_sec = 0.0           # longest pass in passes_index
+        self._decoded_cache = (None, 0)   # (DECODED_DIR mtime_ns, PNG count)
+        self._status_cache = (0.0, None)  # (time.monotonic(), /api/status JSON bytes)
         self.capture_history = []
         self.start_time = datetime.now(timezone.utc)
     
@@ -139,54 +226,331 @@ class SystemState:
                 'server_time_utc': datetime.now(timezone.utc).isoformat(),
             }
     
+    def set_orbital_cache(self, data, cache_key, etag, payload, payload_msgpack=None):
+        """Install freshly generated orbital data together with its serialized forms."""
+        payload_gz = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+        passes_index, max_pass_sec = _index_passes(data)
+        with self._lock:
+            self.last_orbital_update = datetime.now(timezone.utc).isoformat()
+            self.cached_orbital_data = data
+            self.orbital_cache_key = cache_key
+            self.orbital_cache_time = time.monotonic()
+            self.orbital_etag = etag
+            self.orbital_payload = payload
+            self.orbital_payload_gz = payload_gz
+            self.orbital_payload_msgpack = payload_msgpack
+            self.passes_index = passes_index
+            self.max_pass_sec = max_pass_sec
+            self._status_cache = (0.0, None)
+    
+    def invalidate_orbital_cache(self):
+        """Drop cached orbital data and every form derived from it."""
+        with self._lock:
+            self.cached_orbital_data = None
+            self.orbital_cache_key = None
+            self.orbital_etag = None
+            self.orbital_payload = None
+            self.orbital_payload_gz = None
+            self.orbital_payload_msgpack = None
+            self.passes_index = {}
+            self.max_pass_sec = 0.0
+            self._status_cache = (0.0, None)
+    
+    def pass_index(self):
+        """(passes_index, max_pass_sec) for the cached orbital data."""
+        with self._lock:
+            return self.passes_index, self.max_pass_sec
+    
+    def orbital_response(self):
+        """
+        Consistent (etag, payload, gzip payload, msgpack payload) snapshot;
+        payloads are None if not cached.
+        """
+        with self._lock:
+            return (self.orbital_etag, self.orbital_payload, self.orbital_payload_gz,
+                    self.orbital_payload_msgpack)
+    
+    def decoded_image_count(self):
+        """Number of decoded PNGs; the directory is rescanned only when its mtime changes."""
+        try:
+            mtime = os.stat(DECODED_DIR).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            cached_mtime, count = self._decoded_cache
+            if cached_mtime == mtime:
+                return count
+        with os.scandir(DECODED_DIR) as it:
+            count = sum(1 for entry in it
+                        if entry.name.endswith('.png') and not entry.name.startswith('.'))
+        with self._lock:
+            self._decoded_cache = (mtime, count)
+        return count
+    
+    def request_sdr_poll(self):
+        """Wake the SDR poller if the last check is older than SDR_POLL_INTERVAL_SEC."""
+        if time.monotonic() - self._sdr_check_ts > SDR_POLL_INTERVAL_SEC:
+            self.sdr_poll_event.set()
+    
+    def cached_status(self):
+        """Serialized /api/status body if built within STATUS_CACHE_TTL_SEC, else None."""
+        with self._lock:
+            built, body = self._status_cache
+            if time.monotonic() - built < STATUS_CACHE_TTL_SEC:
+                return body
+            return None
+    
+    def store_status(self, body):
+        with self._lock:
+            self._status_cache = (time.monotonic(), body)
+    
     def set_capturing(self, pass_info):
         with self._lock:
             self.capturing = True
             self.current_capture = pass_info
+            self._status_cache = (0.0, None)
+    
+    def try_set_capturing(self, pass_info):
+        """Claim the SDR for a capture; False if one is already running."""
+        with self._lock:
+            if self.capturing:
+                return False
+            self.capturing = True
+            self.current_capture = pass_info
+            self._status_cache = (0.0, None)
+            return True
     
     def clear_capturing(self):
         with self._lock:
             self.capturing = False
             self.current_capture = None
+            self._status_cache = (0.0, None)
 
 state = SystemState()
 
 
+def _index_passes(data):
+    """
+    Index the passes in orbital data for /api/passes.
+    
+    Returns ({role: (aos_unix list, passes)}, longest pass in seconds). Each
+    pass list is sorted by AOS and has satellite and role merged into every
+    pass; the None key holds all passes.
+    """
+    all_passes = [
+        {**p, 'satellite': sat_name, 'role': sat_data.get('role')}
+        for sat_name, sat_data in data.get('satellites', {}).items()
+        for p in sat_data.get('passes', [])
+    ]
+    all_passes.sort(key=itemgetter('aos_unix'))
+    by_role = {}
+    for p in all_passes:
+        by_role.setdefault(p['role'], []).append(p)
+    by_role[None] = all_passes
+    index = {role: ([p['aos_unix'] for p in passes], passes)
+             for role, passes in by_role.items()}
+    max_pass_sec = max((p['los_unix'] - p['aos_unix'] for p in all_passes), default=0.0)
+    return index, max_pass_sec
+
+
 # =============================================================
 # Orbital Data Generation (wraps generate_orbital_data.py)
 # =============================================================
+ORBITAL_CACHE_TTL_SEC = 600
+GENERATOR_PATH = HMI_DIR / 'generate_orbital_data.py'
+
+ORBITAL_FLOAT_DECIMALS = 5
+
+ORBITAL_WORKER_TIMEOUT_SEC = 120
+ORBITAL_WORKER_MAX_TASKS = 20   # recycle the worker to bound its memory
+
+_orbital_pool = None        # (ProcessPoolExecutor, generator file mtime)
+_orbital_pool_tasks = 0
+_generate_lock = threading.Lock()   # one generation at a time; the worker is single-slot
+_last_generation_start = 0.0        # time.monotonic() when the latest generation began
+
+
+def _round_floats(obj, ndigits=ORBITAL_FLOAT_DECIMALS):
+    """Copy of a JSON-like structure with floats rounded to shrink the payload."""
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, dict):
+        return {k: _round_floats(v, ndigits) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_round_floats(v, ndigits) for v in obj]
+    return obj
+
+
+def _orbital_config_hash(config):
+    """Hash of the config fields that affect orbital data."""
+    relevant = {
+        'station': config['station'],
+        'propagation_hours': config['hmi']['propagation_hours'],
+        'position_step_sec': config['hmi']['position_step_sec'],
+    }
+    blob = json.dumps(relevant, sort_keys=True).encode()
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+_tle_mtime_cache = (0.0, None)      # (newest tle_*.txt mtime, monotonic check time)
+_tle_mtime_lock = threading.Lock()
+
+
+def _tle_mtime(refresh=False):
+    """
+    Newest mtime of the TLE files the generator caches in TLE_DIR.
+    
+    The directory is rescanned at most every CONFIG_STAT_INTERVAL_SEC unless
+    refresh is set.
+    """
+    global _tle_mtime_cache
+    with _tle_mtime_lock:
+        mtime, checked = _tle_mtime_cache
+        now = time.monotonic()
+        if refresh or checked is None or now - checked >= CONFIG_STAT_INTERVAL_SEC:
+            mtime = max((p.stat().st_mtime for p in TLE_DIR.glob('tle_*.txt')), default=0.0)
+            _tle_mtime_cache = (mtime, now)
+        return mtime
+
+
+def _init_orbital_worker(hmi_dir):
+    """Worker initializer: import Skyfield and the generator once per process."""
+    if hmi_dir not in sys.path:
+        sys.path.insert(0, hmi_dir)
+    import generate_orbital_data  # noqa: F401
+
+
+def _run_orbital_worker(params):
+    """Runs in the worker process; params are passed straight to generate_data."""
+    import generate_orbital_data
+    return generate_orbital_data.generate_data(**params)
+
+
+def _get_orbital_pool():
+    """
+    Return the warm generator worker, starting a new one if there is none,
+    it has served ORBITAL_WORKER_MAX_TASKS runs, or the generator file changed.
+    """
+    global _orbital_pool, _orbital_pool_tasks
+    mtime = GENERATOR_PATH.stat().st_mtime
+    if _orbital_pool is not None:
+        pool, pool_mtime = _orbital_pool
+        if pool_mtime == mtime and _orbital_pool_tasks < ORBITAL_WORKER_MAX_TASKS:
+            return pool
+        _shutdown_orbital_pool()
+    
+    # spawn rather than fork: the server process has live threads and sockets
+    pool = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_orbital_worker,
+        initargs=(str(HMI_DIR),),
+    )
+    _orbital_pool = (pool, mtime)
+    _orbital_pool_tasks = 0
+    return pool
+
+
+def _shutdown_orbital_pool(kill=False):
+    """
+    Drop the generator worker; the next run starts a fresh one.
+    
+    shutdown() only cancels queued runs, so with kill set the worker process
+    itself is terminated (for a worker that hung or timed out).
+    """
+    global _orbital_pool
+    if _orbital_pool is not None:
+        pool = _orbital_pool[0]
+        _orbital_pool = None
+        workers = list((pool._processes or {}).values()) if kill else []
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.join(timeout=5)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cached_orbital_data(key):
+    """Cached orbital data if it was built for `key` within ORBITAL_CACHE_TTL_SEC."""
+    if (state.cached_orbital_data is not None
+            and state.orbital_cache_key == key
+            and time.monotonic() - state.orbital_cache_time < ORBITAL_CACHE_TTL_SEC):
+        return state.cached_orbital_data
+    return None
+
+
+def get_orbital_data(config):
+    """
+    Return orbital data, regenerating only when the cached copy is older than
+    ORBITAL_CACHE_TTL_SEC or was built from a different config or TLE set.
+    
+    Concurrent callers that find the cache stale share one regeneration.
+    """
+    key = (_orbital_config_hash(config), _tle_mtime())
+    data = _cached_orbital_data(key)
+    if data is not None:
+        return data
+    
+    with _generate_lock:
+        # Another request may have regenerated it while this one waited
+        data = _cached_orbital_data(key)
+        if data is not None:
+            return data
+        print("[API] Generating fresh orbital data...")
+        return _generate_orbital_data_locked(config)
+
+
 def generate_orbital_data(config):
     """
     Generate orbital data using the existing generate_orbital_data module.
     Returns the data dict directly instead of writing to file.
+    
+    Callers queued behind a run that started after they asked reuse its
+    result instead of generating again.
     """
+    requested = time.monotonic()
+    with _generate_lock:
+        if _last_generation_start >= requested and state.cached_orbital_data is not None:
+            return state.cached_orbital_data
+        return _generate_orbital_data_locked(config)
+
+
+def _generate_orbital_data_locked(config):
+    global _orbital_pool_tasks, _last_generation_start
+    _last_generation_start = time.monotonic()
     try:
-        # Import the generator - it lives in hmi/
-        sys.path.insert(0, str(HMI_DIR))
-        
-        # We need to patch the ground station location from config
-        import importlib
-        if 'generate_orbital_data' in sys.modules:
-            mod = importlib.reload(sys.modules['generate_orbital_data'])
-        else:
-            mod = importlib.import_module('generate_orbital_data')
+        params = {
+            'duration_hours': config['hmi']['propagation_hours'],
+            'position_step_sec': config['hmi']['position_step_sec'],
+            'output_path': str(DATA_DIR / 'orbital_data.json'),
+            'lat': config['station']['lat'],
+            'lon': config['station']['lon'],
+            'elevation_m': config['station']['elevation_m'],
+            'min_elevation': config['station']['min_elevation_deg'],
+            'tle_dir': str(TLE_DIR),
+        }
         
-        # Patch ground station from config
-        mod.GS_LAT = config['station']['lat']
-        mod.GS_LON = config['station']['lon']
-        mod.GS_ELEV = config['station']['elevation_m']
-        mod.MIN_ELEVATION = config['station']['min_elevation_deg']
+        pool = _get_orbital_pool()
+        _orbital_pool_tasks += 1
+        try:
+            data = pool.submit(_run_orbital_worker, params).result(
+                timeout=ORBITAL_WORKER_TIMEOUT_SEC)
+        except (BrokenProcessPool, FuturesTimeout):
+            # Worker died or hung; kill it and start clean next time
+            _shutdown_orbital_pool(kill=True)
+            raise
         
-        # Generate data
-        data = mod.generate_data(
-            duration_hours=config['hmi']['propagation_hours'],
-            position_step_sec=config['hmi']['position_step_sec'],
-            output_path=str(DATA_DIR / 'orbital_data.json'),
+        # Serialize (and compress) once per generation rather than per request
+        config_hash = _orbital_config_hash(config)
+        rounded = _round_floats(data)
+        state.set_orbital_cache(
+            data,
+            cache_key=(config_hash, _tle_mtime(refresh=True)),   # the run may have refreshed TLEs
+            etag=f'"{config_hash}-{time.time_ns():x}"',
+            payload=json_dumps(rounded),
+            payload_msgpack=msgpack.packb(rounded, use_bin_type=True) if msgpack else None,
         )
         
-        state.last_orbital_update = datetime.now(timezone.utc).isoformat()
-        state.cached_orbital_data = data
-        
         return data
         
     except Exception as e:
@@ -198,43 +562,51 @@ def generate_orbital_data(config):
 # =============================================================
 # Mission Log
 # =============================================================
-def load_mission_log():
-    """Load mission history from disk."""
-    if MISSION_LOG_PATH.exists():
-        try:
-            with open(MISSION_LOG_PATH, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+def load_mission_log(limit=None):
+    """Load mission history (only the latest `limit` entries if given), oldest first."""
+    return get_mission_db(DATA_DIR).recent(limit)
 
 
 def append_mission_log(entry):
     """Append a mission result to the log."""
-    log = load_mission_log()
-    log.append(entry)
-    MISSION_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(MISSION_LOG_PATH, 'w') as f:
-        json.dump(log, f, indent=2)
-    return log
+    return get_mission_db(DATA_DIR).insert(entry)
 
 
 # =============================================================
 # SDR Detection
 # =============================================================
+SDR_CHECK_TTL_SEC = 10.0
+
+
 def check_sdr():
-    """Check if RTL-SDR is connected."""
+    """
+    Check if RTL-SDR is connected.
+    
+    rtl_test briefly claims the USB device, so the result is reused for
+    SDR_CHECK_TTL_SEC, and the device is not probed at all while a capture
+    is running (it is present, just busy).
+    """
+    with state._lock:
+        if state.capturing:
+            return True
+        if time.monotonic() - state._sdr_check_ts < SDR_CHECK_TTL_SEC:
+            return state.sdr_connected
+    
     try:
         result = subprocess.run(
             ['rtl_test', '-t'],
             capture_output=True, text=True, timeout=5
         )
         connected = 'Found' in result.stdout or 'Found' in result.stderr
-        state.sdr_connected = connected
-        return connected
     except (FileNotFoundError, subprocess.TimeoutExpired):
-        state.sdr_connected = False
-        return False
+        connected = False
+    
+    with state._lock:
+        if state.sdr_connected != connected:
+            state._status_cache = (0.0, None)
+        state.sdr_connected = connected
+        state._sdr_check_ts = time.monotonic()
+    return connected
 
 
 # =============================================================
@@ -292,7 +664,7 @@ def run_capture_async(pass_info, config):
                     pipeline_pass.get('satellite', 'Unknown'),
                     pipeline_pass.get('aos_time'),
                     pipeline_pass.get('los_time'),
-                    freq_hz
+                    center_freq_hz=freq_hz
                 )
             except Exception as e:
                 print(f"[CAPTURE] Doppler calc failed, capturing without: {e}")
@@ -307,7 +679,7 @@ def run_capture_async(pass_info, config):
                     'points': []
                 }
             
-            capture_file = execute_capture(pipeline_pass, doppler_profile)
+            capture_file = execute_capture(pipeline_pass, doppler_profile, config['capture'])
             mission_entry['capture_file'] = str(capture_file) if capture_file else None
             mission_entry['capture_success'] = capture_file is not None
         except Exception as e:
@@ -347,27 +719,128 @@ def run_capture_async(pass_info, config):
 # =============================================================
 # HTTP Request Handler
 # =============================================================
+MAX_REQUEST_BODY_BYTES = 1 << 20    # config and capture requests are a few KB
+
+# JSON responses at least this large are gzipped on the fly (orbital data is
+# compressed once per generation instead)
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+# Decoded images are written once per capture and never change; HMI assets
+# change only when the software is updated; anything else is revalidated.
+DECODED_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+HMI_CACHE_CONTROL = 'public, max-age=300'
+
+
+def _static_cache_control(file_path):
+    """Cache-Control value for a static file, chosen by its directory."""
+    file_path = Path(file_path).resolve()
+    if file_path.is_relative_to(DECODED_DIR.resolve()):
+        return DECODED_CACHE_CONTROL
+    if file_path.is_relative_to(HMI_DIR):
+        return HMI_CACHE_CONTROL
+    return 'no-cache'
+
+
 class SATCOMHandler(SimpleHTTPRequestHandler):
     """
     Handles both static file serving (HMI) and REST API requests.
     """
     
+    # Keep-alive lets the HMI poll over one connection; every response
+    # therefore carries a Content-Length. TCP_NODELAY on accepted sockets
+    # so small JSON replies aren't held back by Nagle's algorithm.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
     # Suppress default logging for clean output
     def log_message(self, format, *args):
-        path = args[0].split()[1] if args else ''
-        # Only log API calls and errors, not static file requests
-        if '/api/' in str(path) or '40' in str(args[-1:]):
-            print(f"[HTTP] {args[0]}")
-    
-    def send_json(self, data, status=200):
-        """Send a JSON response."""
-        body = json.dumps(data, separators=(',', ':'))
+        if len(args) != 3:
+            # log_error() and other ad-hoc messages: always log
+            print(f"[HTTP] {format % args}")
+            return
+        # log_request(): (requestline, code, size). Only log API calls
+        # and error responses, not static file requests.
+        requestline, code = args[0], str(args[1])
+        if code.startswith(('4', '5')) or '/api/' in requestline:
+            print(f"[HTTP] {requestline}")
+    
+    def accepts_gzip(self):
+        """True if the client's Accept-Encoding allows gzip."""
+        for coding in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = coding.partition(';')
+            if name.strip().lower() not in ('gzip', '*'):
+                continue
+            _, _, q = params.partition('q=')
+            try:
+                return float(q) > 0 if q.strip() else True
+            except ValueError:
+                return True
+        return False
+    
+    def send_json(self, data, status=200, headers=None, revalidate=False):
+        """
+        Send a JSON response (serialized once, straight to bytes).
+        
+        With revalidate=True the response carries a weak ETag of the body and
+        a matching If-None-Match gets 304 Not Modified instead.
+        """
+        body = json_dumps(data)
+        etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"' if revalidate else None
+        self.send_prepared_json(body, status, headers, etag=etag)
+    
+    def send_prepared_json(self, body, status=200, headers=None, etag=None,
+                           content_type='application/json'):
+        """
+        Send already-serialized JSON bytes (304 if the client has `etag`).
+        
+        Bodies of GZIP_MIN_BYTES or more are gzipped for clients that accept
+        it, unless they are already encoded or are not JSON.
+        """
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_not_modified(etag, headers)
+            return
+        headers = dict(headers or {})
+        if len(body) >= GZIP_MIN_BYTES:
+            headers.setdefault('Vary', 'Accept-Encoding')
+            if ('Content-Encoding' not in headers and content_type == 'application/json'
+                    and self.accepts_gzip()):
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+                headers['Content-Encoding'] = 'gzip'
         self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Content-Length', len(body.encode()))
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', len(body))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if etag:
+            self.send_header('ETag', etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_not_modified(self, etag=None, headers=None):
+        """Send 304 Not Modified (no body)."""
+        self.send_response(304)
+        if etag:
+            self.send_header('ETag', etag)
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            if name in ('Cache-Control', 'Vary', 'Last-Modified'):
+                self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(body.encode())
+    
+    def not_modified_since(self, mtime):
+        """True if If-Modified-Since covers `mtime` (ignored when If-None-Match is sent)."""
+        ims = self.headers.get('If-Modified-Since')
+        if not ims or 'If-None-Match' in self.headers:
+            return False
+        try:
+            ims_dt = email.utils.parsedate_to_datetime(ims)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims_dt.tzinfo is None:
+            ims_dt = ims_dt.replace(tzinfo=timezone.utc)
+        return int(mtime) <= ims_dt.timestamp()
     
     def send_error_json(self, status, message):
         """Send a JSON error response."""
@@ -376,53 +849,58 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
     def do_GET(self):
         parsed = urlparse(self.path)
         path = parsed.path
+        self.query = parse_qs(parsed.query)
         
-        # ---- API Routes ----
-        if path == '/api/orbital-data':
-            self.handle_orbital_data()
-        elif path == '/api/passes':
-            self.handle_passes(parse_qs(parsed.query))
-        elif path == '/api/status':
-            self.handle_status()
-        elif path == '/api/missions':
-            self.handle_missions()
-        elif path == '/api/config':
-            self.handle_get_config()
+        handler = self.GET_ROUTES.get(path)
+        if handler is not None:
+            handler(self)
         elif path.startswith('/api/decoded/'):
             self.handle_decoded_image(path)
-        
-        # ---- Static Files (HMI) ----
-        elif path == '/' or path == '/index.html':
-            self.serve_file(HMI_DIR / 'satellite-viz.html', 'text/html')
-        elif path == '/orbital_data.json':
-            # Backwards compatibility — redirect to API
-            self.handle_orbital_data()
         else:
-            # Try to serve from hmi/ directory
-            file_path = HMI_DIR / path.lstrip('/')
-            if file_path.exists() and file_path.is_file():
-                self.serve_file(file_path)
-            else:
-                # Try from project root (for any other static assets)
-                file_path = BASE_DIR / path.lstrip('/')
-                if file_path.exists() and file_path.is_file():
-                    self.serve_file(file_path)
-                else:
-                    self.send_error_json(404, f'Not found: {path}')
+            self.serve_static(path)
+    
+    def read_body(self):
+        """
+        Read the request body in one bounded read. Called before routing so
+        that it is always consumed, even on error paths; otherwise it would
+        be parsed as the next request on a kept-alive connection.
+        
+        Returns False (after sending an error) if the body is too large.
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = 0
+            self.close_connection = True
+        if length > MAX_REQUEST_BODY_BYTES:
+            self.close_connection = True
+            self.send_error_json(413, f'Request body over {MAX_REQUEST_BODY_BYTES} bytes')
+            return False
+        self.request_body = self.rfile.read(length) if length > 0 else b''
+        return True
+    
+    def read_json_object(self):
+        """Request body parsed as a JSON object ({} if empty)."""
+        if not self.request_body:
+            return {}
+        obj = json_loads(self.request_body)
+        if not isinstance(obj, dict):
+            raise ValueError('expected a JSON object')
+        return obj
     
     def do_PUT(self):
-        parsed = urlparse(self.path)
-        if parsed.path == '/api/config':
-            self.handle_put_config()
-        else:
-            self.send_error_json(404, 'Not found')
+        if self.read_body():
+            self.dispatch(self.PUT_ROUTES)
     
     def do_POST(self):
-        parsed = urlparse(self.path)
-        if parsed.path == '/api/capture':
-            self.handle_capture()
-        elif parsed.path == '/api/refresh':
-            self.handle_refresh()
+        if self.read_body():
+            self.dispatch(self.POST_ROUTES)
+    
+    def dispatch(self, routes):
+        """Call the handler for this request's path, or send 404."""
+        handler = routes.get(urlparse(self.path).path)
+        if handler is not None:
+            handler(self)
         else:
             self.send_error_json(404, 'Not found')
     
@@ -432,60 +910,53 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     # ---- Handlers ----
     
     def handle_orbital_data(self):
-        """Generate and return orbital data."""
-        config = load_config()
-        
-        # Use cache if fresh (< 10 min old)
-        if state.cached_orbital_data and state.last_orbital_update:
-            try:
-                last = datetime.fromisoformat(state.last_orbital_update)
-                age = (datetime.now(timezone.utc) - last).total_seconds()
-                if age < 600:  # 10 minutes
-                    self.send_json(state.cached_orbital_data)
-                    return
-            except Exception:
-                pass
+        """Return orbital data (cached; 304 if the client's copy is current)."""
+        config = get_config()
+        data = get_orbital_data(config)
+        etag, payload, payload_gz, payload_msgpack = state.orbital_response()
         
-        print("[API] Generating fresh orbital data...")
-        data = generate_orbital_data(config)
+        if data is None or payload is None:
+            self.send_error_json(500, 'Failed to generate orbital data')
+            return
         
-        if data:
-            self.send_json(data)
+        headers = {'Vary': 'Accept, Accept-Encoding', 'Cache-Control': 'max-age=60, must-revalidate'}
+        if payload_msgpack is not None and 'application/msgpack' in self.headers.get('Accept', ''):
+            # Opt-in binary form (smaller, faster to parse), sent uncompressed
+            self.send_prepared_json(payload_msgpack, headers=headers, etag=etag[:-1] + '-mp"',
+                                    content_type='application/msgpack')
+        elif self.accepts_gzip():
+            # Each representation gets its own validator
+            headers['Content-Encoding'] = 'gzip'
+            self.send_prepared_json(payload_gz, headers=headers, etag=etag[:-1] + '-gz"')
         else:
-            self.send_error_json(500, 'Failed to generate orbital data')
+            self.send_prepared_json(payload, headers=headers, etag=etag)
     
-    def handle_passes(self, query):
+    def handle_passes(self):
         """Return upcoming passes, optionally filtered."""
-        config = load_config()
+        config = get_config()
         
-        # Use cached data if available
-        if not state.cached_orbital_data:
-            generate_orbital_data(config)
-        
-        if not state.cached_orbital_data:
+        if get_orbital_data(config) is None:
             self.send_error_json(500, 'No orbital data available')
             return
         
-        # Extract passes from all satellites
-        min_el = float(query.get('min_elevation', [0])[0])
-        role_filter = query.get('role', [None])[0]
-        
-        passes = []
-        for sat_name, sat_data in state.cached_orbital_data.get('satellites', {}).items():
-            for p in sat_data.get('passes', []):
-                if p['max_el'] >= min_el:
-                    if role_filter and sat_data.get('role') != role_filter:
-                        continue
-                    pass_entry = {**p, 'satellite': sat_name, 'role': sat_data.get('role')}
-                    passes.append(pass_entry)
+        min_el = float(self.query.get('min_elevation', [0])[0])
+        role_filter = self.query.get('role', [None])[0]
         
-        # Sort by AOS time
-        passes.sort(key=lambda p: p.get('aos_unix', 0))
+        # Sorted by AOS at generation time. Skip ahead to passes that could
+        # still be in progress (AOS within the longest pass), then drop the
+        # ones that have ended.
+        passes_index, max_pass_sec = state.pass_index()
+        aos_keys, source = passes_index.get(role_filter or None, ((), ()))
+        now = time.time()
+        start = bisect_left(aos_keys, now - max_pass_sec)
+        passes = [p for p in islice(source, start, None)
+                  if p['max_el'] >= min_el and p['los_unix'] >= now]
         
         self.send_json({
             'count': len(passes),
@@ -495,44 +966,55 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
     
     def handle_status(self):
         """Return current system status (non-blocking, uses cached SDR state)."""
-        status = state.to_dict()
-        status['decoded_images'] = len(list(DECODED_DIR.glob('*.png'))) if DECODED_DIR.exists() else 0
-        status['config_loaded'] = CONFIG_PATH.exists()
+        state.request_sdr_poll()
+        
+        # Bursts of polls share one serialization; state changes invalidate it
+        body = state.cached_status()
+        if body is None:
+            status = state.to_dict()
+            status['decoded_images'] = state.decoded_image_count()
+            status['config_loaded'] = CONFIG_PATH.exists()
+            body = json_dumps(status)
+            state.store_status(body)
         
-        self.send_json(status)
+        self.send_prepared_json(body)
     
     def handle_missions(self):
-        """Return mission history."""
-        log = load_mission_log()
+        """Return mission history (most recent `limit` entries if given)."""
+        limit = self.query.get('limit', [''])[0]
+        if limit:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = -1
+            if limit < 0:
+                self.send_error_json(400, 'limit must be a non-negative integer')
+                return
+        else:
+            limit = None
+        log = load_mission_log(limit)
         self.send_json({
             'count': len(log),
             'missions': log,
-        })
+        }, revalidate=True)
     
     def handle_get_config(self):
         """Return current configuration."""
-        config = load_config()
-        self.send_json(config)
+        config = get_config()
+        self.send_json(config, revalidate=True)
     
     def handle_put_config(self):
         """Update configuration."""
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length)
-            new_config = json.loads(body)
+            new_config = self.read_json_object()
             
             # Merge with existing config
-            config = load_config()
-            for section in new_config:
-                if section in config and isinstance(config[section], dict):
-                    config[section].update(new_config[section])
-                else:
-                    config[section] = new_config[section]
+            config = _merge_config(copy.deepcopy(get_config()), new_config)
             
             save_config(config)
             
             # Invalidate orbital cache since config changed
-            state.cached_orbital_data = None
+            state.invalidate_orbital_cache()
             
             self.send_json({'status': 'ok', 'config': config})
         except Exception as e:
@@ -545,9 +1027,7 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
             return
         
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length)
-            pass_info = json.loads(body) if body else {}
+            pass_info = self.read_json_object()
             
             # Check AOS time — don't capture if more than 2 minutes away
             aos_unix = pass_info.get('aos_unix', 0)
@@ -563,7 +1043,12 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
                 self.send_error_json(400, f'Too early — AOS in {mins} minutes. Wait until 2 min before AOS.')
                 return
             
-            config = load_config()
+            config = get_config()
+            
+            # Claim the capture slot atomically; requests run concurrently
+            if not state.try_set_capturing(pass_info):
+                self.send_error_json(409, 'Capture already in progress')
+                return
             
             # Launch capture in background thread
             thread = threading.Thread(
@@ -583,8 +1068,8 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
     
     def handle_refresh(self):
         """Force regeneration of orbital data."""
-        state.cached_orbital_data = None
-        config = load_config()
+        state.invalidate_orbital_cache()
+        config = get_config()
         print("[API] Forcing orbital data refresh...")
         data = generate_orbital_data(config)
         if data:
@@ -595,16 +1080,41 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
     def handle_decoded_image(self, path):
         """Serve a decoded APT image."""
         filename = path.replace('/api/decoded/', '')
-        file_path = DECODED_DIR / filename
-        if file_path.exists():
-            self.serve_file(file_path)
-        else:
+        file_path = DECODED_DIR / Path(filename).name
+        if not file_path.is_file():
             self.send_error_json(404, f'Image not found: {filename}')
+            return
+        self.serve_file(file_path)
+    
+    def send_file_body(self, f, size):
+        """
+        Copy an open file to the socket. socket.sendfile() uses os.sendfile()
+        (kernel-side, no userspace copy) and falls back to send() itself.
+        """
+        self.wfile.flush()
+        self.connection.sendfile(f, 0, size)
+    
+    def serve_index(self):
+        """Serve the HMI page."""
+        self.serve_file(HMI_DIR / 'satellite-viz.html', 'text/html')
+    
+    def serve_static(self, path):
+        """Serve a file from hmi/, falling back to the project root."""
+        for root in (HMI_DIR, BASE_DIR):
+            file_path = root / path.lstrip('/')
+            if file_path.is_file():
+                self.serve_file(file_path)
+                return
+        self.send_error_json(404, f'Not found: {path}')
     
     def serve_file(self, file_path, content_type=None):
-        """Serve a static file."""
-        file_path = Path(file_path)
-        if not file_path.exists():
+        """
+        Serve a static file (zero-copy), with a cache policy by location and
+        an ETag/Last-Modified for revalidation.
+        """
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
             self.send_error_json(404, 'Not found')
             return
         
@@ -612,16 +1122,46 @@ class SATCOMHandler(SimpleHTTPRequestHandler):
             content_type, _ = mimetypes.guess_type(str(file_path))
             content_type = content_type or 'application/octet-stream'
         
-        with open(file_path, 'rb') as f:
-            data = f.read()
-        
-        self.send_response(200)
-        self.send_header('Content-Type', content_type)
-        self.send_header('Content-Length', len(data))
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-cache')
-        self.end_headers()
-        self.wfile.write(data)
+        with f:
+            st = os.fstat(f.fileno())
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            headers = {
+                'Last-Modified': self.date_time_string(st.st_mtime),
+                'Cache-Control': _static_cache_control(file_path),
+            }
+            if self.headers.get('If-None-Match') == etag or self.not_modified_since(st.st_mtime):
+                self.send_not_modified(etag, headers)
+                return
+            
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', st.st_size)
+            self.send_header('ETag', etag)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.send_file_body(f, st.st_size)
+    
+    # ---- Routes (exact path -> handler) ----
+    
+    GET_ROUTES = {
+        '/api/orbital-data': handle_orbital_data,
+        '/api/passes': handle_passes,
+        '/api/status': handle_status,
+        '/api/missions': handle_missions,
+        '/api/config': handle_get_config,
+        '/': serve_index,
+        '/index.html': serve_index,
+        '/orbital_data.json': handle_orbital_data,   # backwards compatibility
+    }
+    PUT_ROUTES = {
+        '/api/config': handle_put_config,
+    }
+    POST_ROUTES = {
+        '/api/capture': handle_capture,
+        '/api/refresh': handle_refresh,
+    }
 
 
 # =============================================================
@@ -678,7 +1218,7 @@ Examples:
     args = parser.parse_args()
     
     # Load config
-    config = load_config()
+    config = get_config()
     port = args.port or config['hmi']['http_port']
     
     # Ensure data directories exist
@@ -695,10 +1235,12 @@ Examples:
     else:
         print("NOT FOUND (capture disabled, HMI will work in tracking mode)")
     
-    # Start background SDR polling (every 15 seconds)
+    # Re-check the SDR when a client asks for status (at most every
+    # SDR_POLL_INTERVAL_SEC), otherwise only every SDR_POLL_IDLE_SEC
     def sdr_poll_loop():
         while True:
-            time.sleep(15)
+            state.sdr_poll_event.wait(timeout=SDR_POLL_IDLE_SEC)
+            state.sdr_poll_event.clear()
             try:
                 check_sdr()
             except Exception:
@@ -719,8 +1261,10 @@ Examples:
     else:
         print("[INIT] Skipping orbital data generation (--no-generate)")
     
-    # Start server
-    server = HTTPServer(('0.0.0.0', port), SATCOMHandler)
+    # Start server (one thread per connection, so a slow orbital generation or
+    # image transfer doesn't block other API calls)
+    server = ThreadingHTTPServer(('0.0.0.0', port), SATCOMHandler)
+    server.daemon_threads = True
     
     print(f"\n[SERVER] Listening on http://localhost:{port}")
     print("[SERVER] Press Ctrl+C to stop\n")
@@ -0,0 +1,55 @@
+"""
+Orbital data generator worker: a hung run must not leave its process behind.
+
+Run with: python -m unittest discover tests
+"""
+
+import multiprocessing
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import satcom_server as ss
+
+
+HANGING_GENERATOR = '''
+import time
+
+
+def generate_data(**params):
+    while True:
+        time.sleep(1)
+'''
+
+
+class OrbitalWorkerTimeoutTest(unittest.TestCase):
+
+    def tearDown(self):
+        # Don't let a leaked worker hang the test run on exit
+        for proc in multiprocessing.active_children():
+            proc.kill()
+            proc.join()
+
+    def test_timed_out_worker_is_terminated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            hmi_dir = tmp / 'hmi'
+            hmi_dir.mkdir()
+            generator = hmi_dir / 'generate_orbital_data.py'
+            generator.write_text(HANGING_GENERATOR)
+
+            with mock.patch.multiple(ss, HMI_DIR=hmi_dir, GENERATOR_PATH=generator,
+                                     DATA_DIR=tmp, ORBITAL_WORKER_TIMEOUT_SEC=5):
+                ss._shutdown_orbital_pool(kill=True)
+                self.assertIsNone(ss._generate_orbital_data_locked(ss._default_config()))
+
+            self.assertIsNone(ss._orbital_pool)
+            self.assertEqual(multiprocessing.active_children(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()